@@ -14,278 +14,707 @@
 
 # If a player's king is captured, the game ends, and that player loses.
 
-class Piece:
-    """Initializes a chess piece object with attributes such as color, position, number of moves, captured status, and icon.
-    Each individual piece type will inherit from this class. Contains methods for using the piece's icon and obtaining
-    color and position outside of the class.
+import random
+import struct
+import sys
+from collections import namedtuple
+from enum import IntEnum
+
+# Piece type codes, used as keys into the move offset table
+KING, QUEEN, KNIGHT, BISHOP, ROOK, PAWN, HUNTER, FALCON = range(8)
+
+# Single step (x, y) directions; x is the file (a-h) and y is the rank (1-8)
+ORTHOGONAL = ((0, 1), (0, -1), (1, 0), (-1, 0))
+DIAGONAL = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+
+# Rank each color's pawns start on (and may move forward 2 squares from)
+PAWN_START_RANK = {'WHITE': 1, 'BLACK': 6}
+
+
+# Color codes used to index the board's bitboards and occupancy masks, and stored by pieces
+COLOR_INDEX = {'WHITE': 0, 'BLACK': 1}
+COLOR_NAMES = ('WHITE', 'BLACK')
+
+
+def _build_slider_directions():
+    """Builds the table of directions each sliding piece moves along, keyed by (piece type, color). Hunter and Falcon
+    directions depend on which way is forward for that color.
     """
+    table = {}
+    for color, forward in (('WHITE', 1), ('BLACK', -1)):
+        table[QUEEN, color] = ORTHOGONAL + DIAGONAL
+        table[ROOK, color] = ORTHOGONAL
+        table[BISHOP, color] = DIAGONAL
 
-    def __init__(self, color, position, icon):
-        """Initializes Piece objects with attributes: color, position (on board), icon, and captured.
-        Each piece is initialized to its starting position with 0 moves made and not currently captured.
-        The icon is initialized to None and updated in each piece's own class.
-        """
+        # Hunter moves forward like a rook, or backward like a bishop
+        table[HUNTER, color] = ((0, forward), (1, -forward), (-1, -forward))
 
-        self._color = color
-        self._position = position
-        self._icon = icon
-        self._captured = "NO"
+        # Falcon moves forward like a bishop, or backward like a rook
+        table[FALCON, color] = ((1, forward), (-1, forward), (0, -forward))
+    return table
 
-    def get_color(self):
-        """Method to allow access to the color of the Piece object outside of the class.
-        Accepts no parameters, returns self._color.
-        """
-        return self._color
 
-    def get_position(self):
-        """Method to allow access to the position of the Piece object outside of the class.
-        Accepts no parameters, returns self._position.
-        """
-        return self._position
+SLIDER_DIRECTIONS = _build_slider_directions()
 
-    def get_icon(self):
-        """Method to allow access to the icon of the Piece object outside of the class.
-        Accepts no parameters, returns self._icon.
-        """
-        return self._icon
 
-    def set_captured(self):
-        """Method to set the piece as captured.
-        Accepts no parameters, no return.
-        """
-        self._captured = 'YES'
+def _slide(directions):
+    """Returns a frozenset of every (x, y) offset reachable by moving 1 to 7 squares along each of the directions."""
+    return frozenset((x * num, y * num) for x, y in directions for num in range(1, 8))
 
 
-class King(Piece):
-    """Class for King piece objects, inheriting from the Piece class. Contains a method for creating/obtaining legal moves.
+def _build_move_offsets():
+    """Builds the move offset table, keyed by (piece type, color). Pieces that move the same way for both colors share
+    a single frozenset; Pawn, Hunter, and Falcon moves depend on which way is forward for that color. Offsets are the
+    moves on an empty board: sliding pieces are blocked by any piece in their way.
     """
+    king = frozenset(ORTHOGONAL + DIAGONAL)
+    knight = frozenset([(2, 1), (-2, 1), (1, 2), (-1, 2), (2, -1), (-2, -1), (1, -2), (-1, -2)])
+    sliders = {directions: _slide(directions) for directions in set(SLIDER_DIRECTIONS.values())}
 
-    def __init__(self, color, position, icon):
-        """Initializes King piece objects; inherits color, position, and icon from the Piece class.
-        Initializes legal_moves list to a list of coordinates corresponding to moves the King can make.
-        """
+    table = {}
+    for color, forward in (('WHITE', 1), ('BLACK', -1)):
+        table[KING, color] = king
+        table[KNIGHT, color] = knight
 
-        super().__init__(color, position, icon)
+        # Pawn moves forward 1 square, 2 squares from its starting rank, and captures diagonally forward
+        table[PAWN, color] = frozenset([(0, forward), (0, 2 * forward), (-1, forward), (1, forward)])
 
-        # King can move 1 square in any direction
-        self._legal_moves = [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+        for piece_type in (QUEEN, BISHOP, ROOK, HUNTER, FALCON):
+            table[piece_type, color] = sliders[SLIDER_DIRECTIONS[piece_type, color]]
+    return table
 
-    def get_legal_moves(self):
-        """Method for obtaining the King's legal move list outside of the class.
-        Takes no parameters, returns self._legal_moves.
-        """
-        return self._legal_moves
 
+# Built once at import and shared by every piece; never modified
+MOVE_OFFSETS = _build_move_offsets()
 
-class Queen(Piece):
-    """Class for Queen piece objects, inheriting from the Piece class. Contains a method for creating/obtaining legal moves.
+
+def _build_rays():
+    """Builds the ray table, keyed by direction. Each entry is a list of 64 bitboards holding every square reached by
+    sliding from that square (index rank * 8 + file) to the edge of the board along the direction.
+    """
+    rays = {}
+    for x_dir, y_dir in ORTHOGONAL + DIAGONAL:
+        masks = []
+        for square in range(64):
+            mask = 0
+            x, y = square % 8 + x_dir, square // 8 + y_dir
+            while 0 <= x < 8 and 0 <= y < 8:
+                mask |= 1 << (y * 8 + x)
+                x, y = x + x_dir, y + y_dir
+            masks.append(mask)
+        rays[x_dir, y_dir] = masks
+    return rays
+
+
+def _build_move_masks():
+    """Builds the move mask table, keyed by (piece type, color) like MOVE_OFFSETS. Each entry is a list of 64
+    bitboards holding the squares a piece of that type and color can move to from each square on an empty board.
+    Sliding pieces take the union of their rays; every other piece uses its offsets from MOVE_OFFSETS.
     """
+    table = {}
+    for (piece_type, color), offsets in MOVE_OFFSETS.items():
+        masks = []
+        for square in range(64):
+            mask = 0
+            if (piece_type, color) in SLIDER_DIRECTIONS:
+                for direction in SLIDER_DIRECTIONS[piece_type, color]:
+                    mask |= RAYS[direction][square]
+            else:
+                for x_diff, y_diff in offsets:
+                    x, y = square % 8 + x_diff, square // 8 + y_diff
+                    if 0 <= x < 8 and 0 <= y < 8:
+                        mask |= 1 << (y * 8 + x)
+            masks.append(mask)
+        table[piece_type, color] = masks
+    return table
+
+
+def _build_attack_masks():
+    """Builds the attack mask table, indexed by piece code (color index * 8 + piece type) and then square: the squares
+    a piece attacks, meaning could capture on, on an empty board. These are its move masks, except that a pawn only
+    attacks diagonally.
+    """
+    table = []
+    for code in range(16):
+        color = 'WHITE' if code < 8 else 'BLACK'
+        piece_type = code & 7
+        masks = list(MOVE_MASKS[piece_type, color])
+        if piece_type == PAWN:
+            for square in range(64):
+                forward = RAYS[0, 1 if color == 'WHITE' else -1][square]
+                masks[square] &= ~forward
+        table.append(masks)
+    return table
+
+
+def _build_between():
+    """Builds the between and beyond tables. When two squares share a rank, file, or diagonal,
+    BETWEEN[from_square][to_square] is the bitboard of the squares strictly between them, and
+    BEYOND[from_square][to_square] is the bitboard of the squares past to_square on the way from from_square to the
+    edge of the board; both are 0 otherwise (and BETWEEN is 0 for adjacent squares). A slide from one square to the
+    other is blocked exactly when the between mask meets the occupied squares.
+    """
+    between = [[0] * 64 for _ in range(64)]
+    beyond = [[0] * 64 for _ in range(64)]
+    for direction, masks in RAYS.items():
+        for square in range(64):
+            path = 0
+            ray = masks[square]
+            while ray:
+                bit = ray & -ray if _is_ascending(direction) else 1 << (ray.bit_length() - 1)
+                target = bit.bit_length() - 1
+                between[square][target] = path
+                beyond[square][target] = masks[target]
+                path |= bit
+                ray ^= bit
+    return between, beyond
+
+
+def _is_ascending(direction):
+    """Returns True if sliding along the (x, y) direction visits increasing square indexes."""
+    x_dir, y_dir = direction
+    return y_dir > 0 or (y_dir == 0 and x_dir > 0)
+
+
+def _build_slider_rays():
+    """Builds the slider ray table, indexed by piece code: None for a piece that does not slide, otherwise a tuple of
+    (ray masks, ascending) for each of its directions, as used by sliding_attacks.
+    """
+    table = []
+    for code in range(16):
+        directions = SLIDER_DIRECTIONS.get((code & 7, COLOR_NAMES[code >> 3]))
+        if directions is None:
+            table.append(None)
+        else:
+            table.append(tuple((RAYS[direction], _is_ascending(direction)) for direction in directions))
+    return table
 
-    def __init__(self, color, position, icon):
-        """Initializes Queen piece objects; inherits color, position, and icon from the Piece class.
-        Initializes legal_moves to an empty list which will be filled with a list of coordinates corresponding to moves the Queen can make in the get_legal_moves method.
-        """
 
-        super().__init__(color, position, icon)
+def sliding_attacks(rays, square, occupied):
+    """Returns the bitboard of squares attacked from the square index along the rays (an entry of SLIDER_RAYS) when
+    the occupied squares block the way. Each ray is cut at its first occupied square with one lookup of the ray from
+    that square, rather than by walking the squares.
+    """
+    attacks = 0
+    for ray, ascending in rays:
+        mask = ray[square]
+        blockers = mask & occupied
+        if blockers:
+            if ascending:
+                mask ^= ray[(blockers & -blockers).bit_length() - 1]
+            else:
+                mask ^= ray[blockers.bit_length() - 1]
+        attacks |= mask
+    return attacks
 
-        # Queen can move any number of squares in any direction
-        self._legal_moves = []
 
-    def get_legal_moves(self):
-        """Method for obtaining the Queen's legal move list outside of the class.
-        Takes no parameters, returns self._legal_moves.
-        """
-        for num in range(8):
-            self._legal_moves.append((0, num))      # Move to the right
-            self._legal_moves.append((0, -num))     # Move to the left
-            self._legal_moves.append((num, 0))      # Move up
-            self._legal_moves.append((-num, 0))     # Move down
-            self._legal_moves.append((num, num))    # Diagonal right up
-            self._legal_moves.append((num, -num))   # Diagonal right down
-            self._legal_moves.append((-num, num))   # Diagonal left up
-            self._legal_moves.append((-num, -num))  # Diagonal left down
-        return self._legal_moves
+RAYS = _build_rays()
+MOVE_MASKS = _build_move_masks()
+ATTACK_MASKS = _build_attack_masks()
+BETWEEN, BEYOND = _build_between()
+SLIDER_RAYS = _build_slider_rays()
 
+# Squares sharing a rank, file, or diagonal with each square (not counting the square itself)
+LINES = [RAYS[0, 1][square] | RAYS[0, -1][square] | RAYS[1, 0][square] | RAYS[-1, 0][square] | RAYS[1, 1][square]
+         | RAYS[1, -1][square] | RAYS[-1, 1][square] | RAYS[-1, -1][square] for square in range(64)]
 
-class Knight(Piece):
-    """Class for Knight piece objects, inheriting from the Piece class. Contains a method for creating/obtaining legal moves.
-    """
+# Number of bit planes holding each side's per-square attack counts (counts up to 31)
+ATTACK_PLANES = 5
 
-    def __init__(self, color, position, icon):
-        """Initializes Knight piece objects; inherits color, position, and icon from the Piece class.
-        Initializes legal_moves list to a list of coordinates corresponding to moves the Knight can make.
-        """
+# Algebraic name of each square index, a1 = 0 through h8 = 63
+SQUARE_NAMES = tuple(file + rank for rank in '12345678' for file in 'abcdefgh')
+SQUARE_INDEX = {name: square for square, name in enumerate(SQUARE_NAMES)}
 
-        super().__init__(color, position, icon)
+# (x, y) coordinates of each square index, as returned by ChessVar.convert_to_coords, and the x of each file letter
+SQUARE_COORDS = tuple((square % 8, square // 8) for square in range(64))
+FILE_INDEX = {file: x for x, file in enumerate('abcdefgh')}
 
-        # Knight moves in L shape: can move 2 squares and then 1 perpendicular, or 1 square and then 2 perpendicular
-        self._legal_moves = [(2, 1), (-2, 1), (1, 2), (-1, 2), (2, -1), (-2, -1), (1, -2), (-1, -2)]
+# Fairy piece types accepted by enter_fairy_piece, with the color and piece type each one enters as, and the bit
+# recording that it has entered the game
+FAIRY_TYPES = {'F': ('WHITE', FALCON), 'H': ('WHITE', HUNTER), 'f': ('BLACK', FALCON), 'h': ('BLACK', HUNTER)}
+FAIRY_BITS = {'F': 1, 'H': 2, 'f': 4, 'h': 8}
 
-    def get_legal_moves(self):
-        """Method for obtaining the Knight's legal move list outside of the class.
-        Takes no parameters, returns self._legal_moves.
-        """
-        return self._legal_moves
+# Squares of each player's two home ranks, where fairy pieces may enter
+HOME_RANKS = {'WHITE': 0xFFFF, 'BLACK': 0xFFFF << 48}
 
 
-class Bishop(Piece):
-    """Class for Bishop piece objects, inheriting from the Piece class. Contains a method for creating/obtaining legal moves.
+def _build_zobrist_keys():
+    """Builds the random 64-bit Zobrist keys from a fixed seed, so keys are the same in every process. Returns keys
+    for each (color index * 8 + piece type, square), for black to move, for each player's capture count, and for each
+    combination of FAIRY_BITS entered.
     """
+    rng = random.Random(0x5EED)
+    pieces = [[rng.getrandbits(64) for _ in range(64)] for _ in range(16)]
+    black_to_move = rng.getrandbits(64)
+    captures = [[rng.getrandbits(64) for _ in range(32)] for _ in range(2)]
+    fairy_entered = [rng.getrandbits(64) for _ in range(16)]
+    return pieces, black_to_move, captures, fairy_entered
 
-    def __init__(self, color, position, icon):
-        """Initializes Bishop piece objects; inherits color, position, and icon from the Piece class.
-        Initializes legal_moves to an empty list which will be filled with a list of coordinates corresponding to moves the Bishop can make in the get_legal_moves method.
-        """
 
-        super().__init__(color, position, icon)
+ZOBRIST_PIECES, ZOBRIST_BLACK_TO_MOVE, ZOBRIST_CAPTURES, ZOBRIST_FAIRY_ENTERED = _build_zobrist_keys()
 
-        # Bishop can move any number of squares diagonally
-        self._legal_moves = []
 
-    def get_legal_moves(self):
-        """Method for obtaining the Bishop's legal move list outside of the class.
-        Takes no parameters, returns self._legal_moves.
+class Move(namedtuple('Move', ['from_square', 'to_square', 'fairy'])):
+    """A move yielded by ChessVar.generate_moves. from_square and to_square are square indexes (rank * 8 + file). For a
+    fairy piece entry, from_square is None and fairy is the piece type being entered ('F', 'f', 'H', or 'h').
+    """
+
+    __slots__ = ()
+
+    def get_arguments(self):
+        """Returns the arguments for playing this move through the string API: (moved_from, moved_to) for
+        make_move, or (type, entry_position) for enter_fairy_piece.
+        """
+        if self.fairy is not None:
+            return self.fairy, SQUARE_NAMES[self.to_square]
+        return SQUARE_NAMES[self.from_square], SQUARE_NAMES[self.to_square]
+
+    def __str__(self):
+        """Returns the move as 'e2e4', or as 'F@d1' for a fairy piece entry."""
+        if self.fairy is not None:
+            return f'{self.fairy}@{SQUARE_NAMES[self.to_square]}'
+        return SQUARE_NAMES[self.from_square] + SQUARE_NAMES[self.to_square]
+
+    @classmethod
+    def from_string(cls, text):
+        """Returns the Move written as 'e2e4', or as 'F@d1' for a fairy piece entry (the format of str(move)).
+        Raises ValueError if the text is not a move in that format.
         """
-        for num in range(8):
-            self._legal_moves.append((num, num))    # Diagonal right up
-            self._legal_moves.append((num, -num))   # Diagonal right down
-            self._legal_moves.append((-num, num))   # Diagonal left up
-            self._legal_moves.append((-num, -num))  # Diagonal left down
-        return self._legal_moves
+        try:
+            if len(text) == 4 and text[1] == '@' and text[0] in FAIRY_TYPES:
+                return cls(None, SQUARE_INDEX[text[2:]], text[0])
+            if len(text) == 4:
+                return cls(SQUARE_INDEX[text[:2]], SQUARE_INDEX[text[2:]], None)
+        except KeyError:
+            pass
+        raise ValueError(f'not a move: {text!r}')
+
+
+class MoveError(IntEnum):
+    """Reason a move or fairy piece entry is rejected, as returned by ChessVar.try_move and
+    ChessVar.try_enter_fairy_piece. OK (zero, so false) means the move is legal.
+    """
 
+    OK = 0
+    GAME_OVER = 1               # The game has already been won
+    MALFORMED_SQUARE = 2        # A position is not a square name such as 'e2'
+    OFF_BOARD = 3               # A position names a file and rank outside the board
+    EMPTY_SQUARE = 4            # There is no piece on the moved-from square
+    WRONG_COLOR = 5             # The moved piece belongs to the other player
+    OWN_PIECE_ON_TARGET = 6     # The moved-to square holds one of the player's own pieces
+    ILLEGAL_OFFSET = 7          # The piece cannot move from the moved-from square to the moved-to square
+    PAWN_BLOCKED = 8            # A pawn moving straight ahead onto an occupied square
+    PAWN_DOUBLE_STEP = 9        # A pawn moving 2 squares from outside its starting rank
+    PAWN_NOT_CAPTURING = 10     # A pawn moving diagonally onto an empty square
+    UNKNOWN_FAIRY = 11          # The fairy piece type is not 'F', 'f', 'H', or 'h'
+    NOT_YOUR_FAIRY = 12         # The fairy piece belongs to the other player
+    FAIRY_ALREADY_ENTERED = 13  # The fairy piece has already entered the game
+    SQUARE_OCCUPIED = 14        # The entry square is occupied
+    NOT_HOME_RANK = 15          # The entry square is outside the player's two home ranks
+    NOT_ELIGIBLE = 16           # The player has not captured enough major pieces to enter another fairy piece
+    PATH_BLOCKED = 17           # A piece stands between the moved-from square and the moved-to square
 
-class Rook(Piece):
-    """Class for Rook piece objects, inheriting from the Piece class. Contains a method for creating/obtaining legal moves.
+
+class Piece:
+    """Initializes a chess piece object with attributes color and icon. Each individual piece type will inherit from this
+    class. Pieces are shared flyweights (see PIECE_POOL) and hold nothing that changes during a game. Contains methods
+    for using the piece's icon and obtaining its color and type outside of the class.
     """
 
-    def __init__(self, color, position, icon):
-        """Initializes Rook piece objects; inherits color, position, and icon from the Piece class.
-        Initializes legal_moves to an empty list which will be filled with a list of coordinates corresponding to moves the Rook can make in the get_legal_moves method.
+    # Pieces are slotted to keep them small: no per-instance __dict__
+    __slots__ = ('_color', '_icon')
+
+    # Piece type code, set by each subclass
+    _type = None
+
+    def __init__(self, color, icon):
+        """Initializes Piece objects with attributes: color (stored as its COLOR_INDEX code) and icon."""
+
+        self._color = COLOR_INDEX[color]
+        self._icon = icon
+
+    def get_color(self):
+        """Method to allow access to the color of the Piece object outside of the class.
+        Accepts no parameters, returns 'WHITE' or 'BLACK'.
         """
+        return COLOR_NAMES[self._color]
+
+    def get_icon(self):
+        """Method to allow access to the icon of the Piece object outside of the class.
+        Accepts no parameters, returns self._icon.
+        """
+        return self._icon
 
-        super().__init__(color, position, icon)
+    def get_type(self):
+        """Method to allow access to the piece type code (KING, QUEEN, ...) outside of the class.
+        Accepts no parameters, returns self._type.
+        """
+        return self._type
 
-        # Rook can move any number of squares horizontally or vertically
-        self._legal_moves = []
+    def get_code(self):
+        """Method to allow access to the piece code (color index * 8 + piece type) used to index the board's bitboards.
+        Accepts no parameters, returns the code.
+        """
+        return self._color * 8 + self._type
 
     def get_legal_moves(self):
-        """Method for obtaining the Rook's legal move list outside of the class.
-        Takes no parameters, returns self._legal_moves.
+        """Method for obtaining the piece's legal move offsets outside of the class.
+        Takes no parameters, returns the frozenset of (x, y) offsets shared by every piece of this type and color.
         """
-        for num in range(8):
-            self._legal_moves.append((0, num))      # Move to the right
-            self._legal_moves.append((0, -num))     # Move to the left
-            self._legal_moves.append((num, 0))      # Move up
-            self._legal_moves.append((-num, 0))     # Move down
-        return self._legal_moves
+        return MOVE_OFFSETS[self._type, COLOR_NAMES[self._color]]
 
+class King(Piece):
+    """Class for King piece objects, inheriting from the Piece class. King can move 1 square in any direction.
+    """
 
-class Pawn(Piece):
-    """Class for Pawn piece objects, inheriting from the Piece class. Contains a method for creating/obtaining legal moves.
+    __slots__ = ()
+    _type = KING
+
+
+class Queen(Piece):
+    """Class for Queen piece objects, inheriting from the Piece class. Queen can move any number of squares in any
+    direction.
     """
 
-    def __init__(self, color, position, icon):
-        """Initializes Pawn piece objects; inherits color, position, and icon from the Piece class.
-        Initializes legal_moves list to a list of coordinates corresponding to moves the Pawn can make.
-        """
+    __slots__ = ()
+    _type = QUEEN
 
-        super().__init__(color, position, icon)
 
-        # Pawn can move forward 1 square, 2 squares on first move, and capture diagonally
-        self._legal_moves = []
+class Knight(Piece):
+    """Class for Knight piece objects, inheriting from the Piece class. Knight moves in L shape: 2 squares and then 1
+    perpendicular, or 1 square and then 2 perpendicular.
+    """
 
-    def get_legal_moves(self):
-        """Method for obtaining the Pawn's legal move list outside of the class.
-        Takes no parameters, returns self._legal_moves.
-        """
-        # White pawn moves
-        if self._color == 'white':
-            self._legal_moves.append((0, 1))        # Move forward 1
-            if self._position[1] == 1:              # If pawn is at starting position
-                self._legal_moves.append((0, 2))    # Move forward 2
-            self._legal_moves.append((-1, 1))      # Capture diagonally left
-            self._legal_moves.append((1, 1))       # Capture diagonally right
-        # Black pawn moves
-        else:
-            self._legal_moves.append((0, -1))       # Move forward 1
-            if self._position[1] == 6:              # If pawn is at starting position
-                self._legal_moves.append((0, -2))   # Move forward 2
-            self._legal_moves.append((-1, -1))     # Capture diagonally left
-            self._legal_moves.append((1, -1))      # Capture diagonally right
-        return self._legal_moves
+    __slots__ = ()
+    _type = KNIGHT
 
 
+class Bishop(Piece):
+    """Class for Bishop piece objects, inheriting from the Piece class. Bishop can move any number of squares diagonally.
+    """
 
-class Hunter(Piece):
-    """Class for Hunter piece objects, inheriting from Piece class. Contains method for creating/obtaining legal moves.
+    __slots__ = ()
+    _type = BISHOP
+
+
+class Rook(Piece):
+    """Class for Rook piece objects, inheriting from the Piece class. Rook can move any number of squares horizontally
+    or vertically.
     """
 
-    def __init__(self, color, position, icon):
-        """Initializes Hunter piece objects; inherits color, position, and icon from Piece class. Initializes legal_moves
-        list to list of coordinates corresponding to moves Hunter can make.
-        """
+    __slots__ = ()
+    _type = ROOK
 
-        super().__init__(color, position, icon)
 
-        # Hunter can move forward like a rook, or backward like a bishop.
-        self._legal_moves = [(0, 1), (1, 0), (-1, 0), (0, -1), (1, -1), (-1, 1)]
+class Pawn(Piece):
+    """Class for Pawn piece objects, inheriting from the Piece class. Pawn can move forward 1 square, 2 squares from its
+    starting rank, and captures diagonally.
+    """
 
-    def get_legal_moves(self):
-        """Method for obtaining Hunter's legal move list outside of class. Takes no parameters, returns self._legal_moves
-        """
+    __slots__ = ()
+    _type = PAWN
+
+
+class Hunter(Piece):
+    """Class for Hunter piece objects, inheriting from Piece class. Hunter moves forward like a rook, or backward like a
+    bishop.
+    """
 
-        return self._legal_moves
+    __slots__ = ()
+    _type = HUNTER
 
 
 class Falcon(Piece):
-    """Class for Falcon piece objects, inheriting from Piece class. Contains method for creating/obtaining legal moves.
+    """Class for Falcon piece objects, inheriting from Piece class. Falcon moves forward like a bishop, or backward like
+    a rook.
     """
 
-    def __init__(self, color, position, icon):
-        """Initializes Falcon piece objects; inherits color, position, and icon from Piece class. Initializes legal_moves
-        list to list of coordinates corresponding to moves Falcon can make.
-        """
+    __slots__ = ()
+    _type = FALCON
 
-        super().__init__(color, position, icon)
 
-        # Falcon can move forward like a bishop, or backward like a rook.
-        self._legal_moves = [(1, 1), (-1, 1), (0, 1), (1, 0), (-1, 0), (0, -1)]
+# Piece class and position-format letter of each piece type code (white uses upper case, black lower case)
+PIECE_CLASSES = (King, Queen, Knight, Bishop, Rook, Pawn, Hunter, Falcon)
+PIECE_LETTERS = 'KQNBRPHF'
 
-    def get_legal_moves(self):
-        """Method for obtaining Falcon's legal move list outside of class. Takes no parameters, returns self._legal_moves
-        """
+# Icon of each (color, piece type)
+PIECE_ICONS = {
+    ('WHITE', KING): '♔', ('WHITE', QUEEN): '♕', ('WHITE', KNIGHT): '♘', ('WHITE', BISHOP): '♗',
+    ('WHITE', ROOK): '♖', ('WHITE', PAWN): '♙', ('WHITE', HUNTER): '↗', ('WHITE', FALCON): '𓅃',
+    ('BLACK', KING): '♚', ('BLACK', QUEEN): '♛', ('BLACK', KNIGHT): '♞', ('BLACK', BISHOP): '♝',
+    ('BLACK', ROOK): '♜', ('BLACK', PAWN): '♟', ('BLACK', HUNTER): '↗', ('BLACK', FALCON): '𓅃',
+}
+
+# Shared flyweight piece of each piece code (color index * 8 + piece type). Boards store piece codes and hand out
+# these pieces, so pieces cost nothing per game; they must not be modified. Captures are recorded in the game's
+# counters instead.
+PIECE_POOL = tuple(PIECE_CLASSES[code & 7](COLOR_NAMES[code >> 3], PIECE_ICONS[COLOR_NAMES[code >> 3], code & 7])
+                   for code in range(16))
+
+# Piece stored on a board square: 0 for an empty square, otherwise piece code + 1
+_SQUARE_PIECES = (None,) + PIECE_POOL
 
-        return self._legal_moves
+# Glyph drawn for each square (indexed by piece code + 1, '.' for an empty square) in each board rendering style:
+# the pieces' Unicode icons, or their position-format letters (white upper case, black lower case)
+RENDER_STYLES = {
+    'unicode': ('.',) + tuple(piece.get_icon() for piece in PIECE_POOL),
+    'ascii': ('.',) + tuple(PIECE_LETTERS) + tuple(PIECE_LETTERS.lower()),
+}
+
+GAME_STATES = ('UNFINISHED', 'WHITE_WON', 'BLACK_WON')
+
+# Saved state of a game, as returned by ChessVar.snapshot. The board is shared with the game and its forks, and must
+# not be changed. The undo stack is a linked list of (undo record, rest of the stack) pairs, None when empty, so it is
+# never changed in place and games share the moves they have in common.
+GameSnapshot = namedtuple('GameSnapshot', [
+    'state', 'players_turn', 'turn_count', 'player1_captures', 'player2_captures', 'player1_special',
+    'player2_special', 'fairy_entered', 'undo_stack', 'board', 'zobrist_key'])
+
+# Fixed-size binary position: occupancy bitboard, one nibble per square (color index * 8 + piece type, rank 1 first),
+# side to move (0 white, 1 black), turn count, each player's capture count, fairy entry bits, and GAME_STATES index
+POSITION_STRUCT = struct.Struct('<Q32sBHBBBB')
+POSITION_SIZE = POSITION_STRUCT.size
 
 
 class Board:
-    """Class for the chess board. Initializes an 8x8 grid with Piece objects representing the current state of the game.
-    Contains methods for initializing the board, displaying the board, moving pieces, and checking for checkmate.
+    """Class for the chess board. Stores the position as bitboards: one 64-bit integer per (color, piece type) plus an
+    occupancy mask per color, where bit (rank * 8 + file) is set when that square holds a matching piece. A parallel
+    byte per square holds the piece code, so the familiar 8x8 grid view of (shared, flyweight) Piece objects can
+    still be produced.
+    Once asked for attacked squares or attack counts, the board also keeps how many of each side's pieces attack every
+    square, updated from then on as pieces are placed and removed; boards that are never asked (such as the ones moves
+    are searched on) do not pay for it. When a square is filled or emptied, the sliding pieces attacking it gain or
+    lose only the squares past it on their line, found with table lookups. The counts are stored bit-sliced:
+    ATTACK_PLANES bitboards per side, where plane i holds bit i of every square's count, so adding or removing a
+    piece's whole attack mask is a handful of integer operations.
+    Contains methods for displaying the board, placing, moving, and removing pieces, and querying the bitboards.
     """
 
+    __slots__ = ('_squares', '_bitboards', '_occupied', '_attacks', '_sliders', '_rendered')
+
     def __init__(self):
-        """Initialize the board with None values to represent empty squares."""
-        self._board = [[None] * 8 for _ in range(8)]
-
-    def print_board(self):
-        """Print the current state of the board."""
-        print('  a b c d e f g h')
-        for row, row_data in enumerate(self._board[::-1], 1):
-            print(row, end=' ')
-            for piece in row_data:
-                if piece is not None:
-                    print(piece.get_icon(), end=' ')
-                else:
-                    print('.', end=' ')
-            print()
+        """Initialize the board with every square empty."""
+        self._squares = bytearray(64)   # Piece code + 1 on each square, or 0 if empty
+        self._bitboards = [0] * 16      # Indexed by piece code (color index * 8 + piece type)
+        self._occupied = [0, 0]         # Indexed by color index
+        self._attacks = None            # Attack count bit planes (color index * ATTACK_PLANES + bit), once tracked
+        self._sliders = 0               # Squares holding a sliding piece, while attacks are tracked
+        self._rendered = None           # (style, square codes, text) of the last render
+
+    def print_board(self, style='unicode', file=None):
+        """Print the current state of the board, rank 8 at the top, with a single write to file (standard output by
+        default). style is 'unicode' for the pieces' icons or 'ascii' for their letters.
+        """
+        (file or sys.stdout).write(self.render(style))
+
+    def render(self, style='unicode'):
+        """Return the board drawn as text, as printed by print_board. The text is cached and reused until a square
+        changes.
+        """
+        cached = self._rendered
+        if cached is not None and cached[0] == style and cached[1] == self._squares:
+            return cached[2]
+        glyphs = RENDER_STYLES[style]
+        squares = self._squares
+        lines = ['  a b c d e f g h\n']
+        for rank in range(7, -1, -1):
+            lines.append(f"{rank + 1} {' '.join([glyphs[code] for code in squares[rank * 8:rank * 8 + 8]])} \n")
+        text = ''.join(lines)
+        self._rendered = (style, bytes(squares), text)
+        return text
 
     def add_piece(self, piece, row, column):
         """Add a piece to the board at the specified position."""
-        self._board[row][column] = piece
+        self.place_piece(piece, row * 8 + column)
 
     def get_board(self):
-        """Return the current state of the board."""
-        return self._board
+        """Return the current state of the board as an 8x8 grid (list of rows, rank 1 first) of Piece objects or None.
+        The grid is rebuilt on each call; changes to it do not affect the board.
+        """
+        pieces = [_SQUARE_PIECES[code] for code in self._squares]
+        return [pieces[row:row + 8] for row in range(0, 64, 8)]
+
+    def get_piece(self, square):
+        """Return the Piece on the square index, or None if it is empty."""
+        return _SQUARE_PIECES[self._squares[square]]
+
+    def get_square_codes(self):
+        """Return a 64-byte copy of the board's squares, rank 1 first: piece code + 1 on each square, or 0 if empty."""
+        return bytes(self._squares)
+
+    def get_piece_code(self, square):
+        """Return the piece code (color index * 8 + piece type) on the square index, or -1 if it is empty."""
+        return self._squares[square] - 1
+
+    def get_bitboard(self, color, piece_type):
+        """Return the bitboard of squares holding pieces of the given color ('WHITE' or 'BLACK') and piece type."""
+        return self._bitboards[COLOR_INDEX[color] * 8 + piece_type]
+
+    def get_occupied(self, color=None):
+        """Return the occupancy mask of the given color, or of both colors if no color is given."""
+        if color is None:
+            return self._occupied[0] | self._occupied[1]
+        return self._occupied[COLOR_INDEX[color]]
+
+    def _track_attacks(self):
+        """Start keeping the attack counts: count every piece's attacks from scratch, then update them on each change."""
+        self._attacks = [0] * (2 * ATTACK_PLANES)
+        self._sliders = 0
+        occupied = self._occupied[0] | self._occupied[1]
+        while occupied:
+            bit = occupied & -occupied
+            square = bit.bit_length() - 1
+            code = self._squares[square] - 1
+            if SLIDER_RAYS[code] is not None:
+                self._sliders |= bit
+            self._add_attacks(code >> 3, self.get_piece_attacks(square))
+            occupied ^= bit
+
+    def is_tracking_attacks(self):
+        """Return whether the board keeps attack counts, which it starts doing when first asked for them."""
+        return self._attacks is not None
+
+    def get_attacked(self, color):
+        """Return the mask of squares attacked by at least one piece of the given color."""
+        if self._attacks is None:
+            self._track_attacks()
+        start = COLOR_INDEX[color] * ATTACK_PLANES
+        attacked = 0
+        for plane in self._attacks[start:start + ATTACK_PLANES]:
+            attacked |= plane
+        return attacked
+
+    def get_attack_count(self, color, square):
+        """Return how many pieces of the given color attack the square index."""
+        if self._attacks is None:
+            self._track_attacks()
+        start = COLOR_INDEX[color] * ATTACK_PLANES
+        count = 0
+        for bit in range(ATTACK_PLANES):
+            count |= (self._attacks[start + bit] >> square & 1) << bit
+        return count
+
+    def get_piece_attacks(self, square):
+        """Return the mask of squares the piece on the square index attacks (taking blocking pieces into account), or 0
+        if the square is empty. For every piece but a pawn, these are also the squares it can move to, apart from
+        those holding its own pieces.
+        """
+        code = self._squares[square] - 1
+        if code < 0:
+            return 0
+        rays = SLIDER_RAYS[code]
+        if rays is None:
+            return ATTACK_MASKS[code][square]
+        return sliding_attacks(rays, square, self._occupied[0] | self._occupied[1])
+
+    def _add_attacks(self, color_index, mask):
+        """Add one to color_index's attack count of every square in the mask."""
+        attacks = self._attacks
+        index = color_index * ATTACK_PLANES
+        carry = mask
+        while carry:
+            plane = attacks[index]
+            attacks[index] = plane ^ carry
+            carry &= plane
+            index += 1
+
+    def _remove_attacks(self, color_index, mask):
+        """Subtract one from color_index's attack count of every square in the mask."""
+        attacks = self._attacks
+        index = color_index * ATTACK_PLANES
+        borrow = mask
+        while borrow:
+            plane = attacks[index]
+            attacks[index] = plane ^ borrow
+            borrow &= ~plane
+            index += 1
+
+    def _update_sliders(self, square, filled):
+        """Update the attack counts of the sliding pieces attacking the square index after it was filled (filled is
+        True) or emptied: each loses (or gains) the squares past it on its line, up to and including the next piece.
+        """
+        candidates = self._sliders & LINES[square]
+        if not candidates:
+            return
+        bit = 1 << square
+        occupied = self._occupied[0] | self._occupied[1]
+        squares = self._squares
+        between = BETWEEN
+        beyond_table = BEYOND
+        while candidates:
+            low = candidates & -candidates
+            slider = low.bit_length() - 1
+            candidates ^= low
+            code = squares[slider] - 1
+            if ATTACK_MASKS[code][slider] & bit and not between[slider][square] & occupied:
+                beyond = beyond_table[slider][square]
+                blockers = beyond & occupied
+                if blockers:
+                    if square > slider:
+                        beyond ^= beyond_table[slider][(blockers & -blockers).bit_length() - 1]
+                    else:
+                        beyond ^= beyond_table[slider][blockers.bit_length() - 1]
+                if filled:
+                    self._remove_attacks(code >> 3, beyond)
+                else:
+                    self._add_attacks(code >> 3, beyond)
+
+    def _take_off(self, code, square):
+        """Take the piece code off the square index, with its attacks, without updating other pieces' attacks."""
+        mask = ~(1 << square)
+        if self._attacks is not None:
+            self._remove_attacks(code >> 3, self.get_piece_attacks(square))
+            self._sliders &= mask
+        self._squares[square] = 0
+        self._bitboards[code] &= mask
+        self._occupied[code >> 3] &= mask
+
+    def place_piece(self, piece, square):
+        """Place a piece on the square index, replacing (and returning) any piece already there. The board stores only
+        the piece's code, so get_piece returns the matching PIECE_POOL piece rather than this object.
+        """
+        code = piece.get_code()
+        removed = self._squares[square] - 1
+        if removed >= 0:
+            # The square stays occupied, so no other piece's attacks change
+            self._take_off(removed, square)
+        bit = 1 << square
+        self._squares[square] = code + 1
+        self._bitboards[code] |= bit
+        self._occupied[code >> 3] |= bit
+        if self._attacks is not None:
+            if SLIDER_RAYS[code] is not None:
+                self._sliders |= bit
+            if removed < 0:
+                self._update_sliders(square, True)
+            self._add_attacks(code >> 3, self.get_piece_attacks(square))
+        return PIECE_POOL[removed] if removed >= 0 else None
+
+    def remove_piece(self, square):
+        """Remove and return the piece on the square index, or return None if it is empty."""
+        code = self._squares[square] - 1
+        if code < 0:
+            return None
+        self._take_off(code, square)
+        if self._attacks is not None:
+            self._update_sliders(square, False)
+        return PIECE_POOL[code]
+
+    def move_piece(self, from_square, to_square):
+        """Move the piece on from_square to to_square, returning the piece captured there (or None)."""
+        return self.place_piece(self.remove_piece(from_square), to_square)
+
+    def copy(self):
+        """Return an independent copy of the board."""
+        board = Board.__new__(Board)
+        board._squares = bytearray(self._squares)
+        board._bitboards = self._bitboards[:]
+        board._occupied = self._occupied[:]
+        board._attacks = self._attacks[:] if self._attacks is not None else None
+        board._sliders = self._sliders
+        board._rendered = self._rendered
+        return board
+
 
 class ChessVar:
     """Class representing a chess game with attributes representing: game state, current player's turn, how many turns have
@@ -293,8 +722,18 @@ class ChessVar:
     for Board class and initializes chess pieces.
     """
 
+    __slots__ = ('_state', '_players_turn', '_turn_count', '_player1_captures', '_player2_captures',
+                 '_player1_special', '_player2_special', '_fairy_entered', '_undo_stack', '_current_board',
+                 '_zobrist_key', '_shared')
+
     def __init__(self):
-        """Initialize ChessVar attributes."""
+        """Initialize ChessVar attributes. The game starts from the prebuilt start position, sharing its board until
+        the first move copies it, so creating a game sets up no pieces.
+        """
+        self.restore(_get_start_snapshot())
+
+    def _initialize_attributes(self):
+        """Initialize the attributes of a game that has not started, with an empty board."""
         self._state = 'UNFINISHED'
         self._players_turn = 'WHITE'
         self._turn_count = 0
@@ -302,34 +741,253 @@ class ChessVar:
         self._player2_captures = 0
         self._player1_special = 0
         self._player2_special = 0
+        self._fairy_entered = 0         # FAIRY_BITS of the fairy pieces that have entered the game
+        self._undo_stack = None         # (undo record, rest of the stack) of the moves made with push, or None
         self._current_board = Board()
-        self._initialize_pieces()
+        self._shared = False            # True while the board may be shared with a snapshot or fork
 
     def _initialize_pieces(self):
-        """Initialize pieces on the board."""
-        # White pieces
-        white_pieces = [('♔', King), ('♕', Queen), ('♘', Knight), ('♗', Bishop),
-                        ('♖', Rook), ('♙', Pawn)]
-        for row, piece_type in enumerate(white_pieces, start=1):
+        """Initialize pieces on the board in their standard starting positions."""
+        back_rank = (Rook, Knight, Bishop, Queen, King, Bishop, Knight, Rook)
+        for color_index, home_row, pawn_row in ((0, 0, 1), (1, 7, 6)):
+            for col, piece_class in enumerate(back_rank):
+                self._current_board.add_piece(PIECE_POOL[color_index * 8 + piece_class._type], home_row, col)
             for col in range(8):
-                piece_symbol, piece_class = piece_type
-                piece = piece_class('WHITE', None, piece_symbol)
-                self._current_board.add_piece(piece, row - 1, col)
-        # Black pieces
-        black_pieces = [('♚', King), ('♛', Queen), ('♞', Knight), ('♝', Bishop),
-                        ('♜', Rook), ('♟', Pawn)]
-        for row, piece_type in enumerate(black_pieces, start=7):
+                self._current_board.add_piece(PIECE_POOL[color_index * 8 + PAWN], pawn_row, col)
+
+    @classmethod
+    def from_position(cls, position):
+        """Create a game directly from a position, without replaying its moves. position is either the text format
+        returned by to_position() or the fixed-size binary format returned by to_position(binary=True). Raises
+        ValueError if the position is malformed.
+        """
+        game = cls.__new__(cls)
+        game._initialize_attributes()
+        if isinstance(position, (bytes, bytearray, memoryview)):
+            game._load_binary_position(position)
+        else:
+            game._load_text_position(position)
+        game._player1_special = bin(game._fairy_entered & 3).count('1')
+        game._player2_special = bin(game._fairy_entered & 12).count('1')
+        game._zobrist_key = game._compute_zobrist_key()
+        return game
+
+    def _place_position_piece(self, square, color, piece_type):
+        """Place a piece read from a position on the square index. A fairy piece must already be marked as entered."""
+        if piece_type in (HUNTER, FALCON):
+            fairy = PIECE_LETTERS[piece_type] if color == 'WHITE' else PIECE_LETTERS[piece_type].lower()
+            if not self._fairy_entered & FAIRY_BITS[fairy] or self._current_board.get_bitboard(color, piece_type):
+                raise ValueError(f'fairy piece {fairy} on board but not entered, or entered twice')
+            piece = self._get_fairy_piece(fairy)
+        else:
+            piece = PIECE_POOL[COLOR_INDEX[color] * 8 + piece_type]
+        self._current_board.place_piece(piece, square)
+
+    def _load_text_position(self, text):
+        """Load the text position format into this game (see to_position)."""
+        fields = text.split()
+        if len(fields) != 6:
+            raise ValueError(f'position needs 6 fields, got {len(fields)}')
+        placement, side, turn_count, captures, entered, state = fields
+
+        try:
+            if side not in ('w', 'b') or state not in GAME_STATES:
+                raise ValueError
+            self._players_turn = 'WHITE' if side == 'w' else 'BLACK'
+            self._state = state
+            self._turn_count = int(turn_count)
+            player1_captures, player2_captures = captures.split('/')
+            self._player1_captures = int(player1_captures)
+            self._player2_captures = int(player2_captures)
+            if entered != '-':
+                for fairy in entered:
+                    if self._fairy_entered & FAIRY_BITS[fairy]:
+                        raise ValueError
+                    self._fairy_entered |= FAIRY_BITS[fairy]
+        except (ValueError, KeyError):
+            raise ValueError(f'malformed position: {text!r}') from None
+        if not 0 <= self._player1_captures < 32 or not 0 <= self._player2_captures < 32 or self._turn_count < 0:
+            raise ValueError(f'counter out of range in position: {text!r}')
+
+        ranks = placement.split('/')
+        if len(ranks) != 8:
+            raise ValueError(f'position board needs 8 ranks: {placement!r}')
+        for row, rank in enumerate(reversed(ranks)):
+            col = 0
+            for letter in rank:
+                if letter.isdigit():
+                    col += int(letter)
+                    continue
+                piece_type = PIECE_LETTERS.find(letter.upper())
+                if piece_type < 0 or col > 7:
+                    raise ValueError(f'malformed position rank: {rank!r}')
+                self._place_position_piece(row * 8 + col, 'WHITE' if letter.isupper() else 'BLACK', piece_type)
+                col += 1
+            if col != 8:
+                raise ValueError(f'position rank does not have 8 squares: {rank!r}')
+
+    def _load_binary_position(self, data):
+        """Load the binary position format into this game (see to_position)."""
+        if len(data) != POSITION_SIZE:
+            raise ValueError(f'binary position must be {POSITION_SIZE} bytes, got {len(data)}')
+        (occupied, nibbles, side, self._turn_count, self._player1_captures, self._player2_captures,
+         self._fairy_entered, state) = POSITION_STRUCT.unpack(data)
+        if side > 1 or state >= len(GAME_STATES) or self._fairy_entered > 15 or max(
+                self._player1_captures, self._player2_captures) >= 32:
+            raise ValueError('malformed binary position')
+        self._players_turn = 'WHITE' if side == 0 else 'BLACK'
+        self._state = GAME_STATES[state]
+
+        while occupied:
+            bit = occupied & -occupied
+            square = bit.bit_length() - 1
+            code = nibbles[square >> 1] >> (4 * (square & 1)) & 15
+            self._place_position_piece(square, 'WHITE' if code < 8 else 'BLACK', code & 7)
+            occupied ^= bit
+
+    def to_position(self, binary=False):
+        """Return the current position, which from_position turns back into an equal game. The text format is
+        six space-separated fields, for example the starting position:
+
+            rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w 0 0/0 - UNFINISHED
+
+        board ranks 8 to 1 (K Q N B R P H F, upper case for white, digits count empty squares), side to move (w or
+        b), turn count, player 1 / player 2 capture counts, fairy pieces entered (letters from FHfh, or -), and game
+        state. Special entry counts follow from the fairy pieces entered. With binary=True, returns the
+        POSITION_SIZE-byte binary format instead.
+        """
+        board = self._current_board
+        if binary:
+            nibbles = bytearray(32)
+            for square in range(64):
+                piece = board.get_piece(square)
+                if piece is not None:
+                    code = COLOR_INDEX[piece.get_color()] * 8 + piece.get_type()
+                    nibbles[square >> 1] |= code << (4 * (square & 1))
+            return POSITION_STRUCT.pack(
+                board.get_occupied(), bytes(nibbles), COLOR_INDEX[self._players_turn], self._turn_count,
+                self._player1_captures, self._player2_captures, self._fairy_entered, GAME_STATES.index(self._state))
+
+        ranks = []
+        for row in range(7, -1, -1):
+            rank = ''
+            empty = 0
             for col in range(8):
-                piece_symbol, piece_class = piece_type
-                piece = piece_class('BLACK', None, piece_symbol)
-                self._current_board.add_piece(piece, row - 1, col)
+                piece = board.get_piece(row * 8 + col)
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    rank += str(empty)
+                    empty = 0
+                letter = PIECE_LETTERS[piece.get_type()]
+                rank += letter if piece.get_color() == 'WHITE' else letter.lower()
+            if empty:
+                rank += str(empty)
+            ranks.append(rank)
+
+        entered = ''.join(fairy for fairy in 'FHfh' if self._fairy_entered & FAIRY_BITS[fairy]) or '-'
+        side = 'w' if self._players_turn == 'WHITE' else 'b'
+        return (f"{'/'.join(ranks)} {side} {self._turn_count} {self._player1_captures}/{self._player2_captures} "
+                f"{entered} {self._state}")
+
+    def _compute_zobrist_key(self):
+        """Compute the Zobrist key of the current position from scratch: piece placement, side to move, each player's
+        capture count, and which fairy pieces have entered (which also determines each player's special count).
+        """
+        board = self._current_board
+        key = 0
+        for square in range(64):
+            piece = board.get_piece(square)
+            if piece is not None:
+                key ^= ZOBRIST_PIECES[COLOR_INDEX[piece.get_color()] * 8 + piece.get_type()][square]
+        if self._players_turn == 'BLACK':
+            key ^= ZOBRIST_BLACK_TO_MOVE
+        key ^= ZOBRIST_CAPTURES[0][self._player1_captures] ^ ZOBRIST_CAPTURES[1][self._player2_captures]
+        key ^= ZOBRIST_FAIRY_ENTERED[self._fairy_entered]
+        return key
+
+    def get_zobrist_key(self):
+        """Get the 64-bit Zobrist key of the current position. Positions that differ only in turn count have the same
+        key; anything else that affects which moves are legal gives a different key.
+        """
+        return self._zobrist_key
+
+    def get_current_board(self, read_only=False):
+        """Get the Board object holding the current position. A board still shared with a snapshot, a fork or the
+        start position is copied first, so changing the returned board only ever affects this game. With
+        read_only=True, the board is returned without copying it, for callers that only read it; it must not be
+        changed then.
+        """
+        if self._shared and not read_only:
+            self._unshare()
+        return self._current_board
+
+    def _get_attack_board(self):
+        """Get a board to read attack counts from. A shared board that does not keep attack counts yet is read through
+        a temporary copy, so that the games sharing it do not all start paying for attack counts.
+        """
+        board = self._current_board
+        if self._shared and not board.is_tracking_attacks():
+            return board.copy()
+        return board
+
+    def snapshot(self):
+        """Save the game's current state in O(1), returning a GameSnapshot that restore or fork can return to. The board
+        and undo stack are shared with the snapshot rather than copied; whichever game changes the board first copies it,
+        and the undo stack is never changed in place.
+        """
+        self._shared = True
+        return GameSnapshot(self._state, self._players_turn, self._turn_count, self._player1_captures,
+                            self._player2_captures, self._player1_special, self._player2_special, self._fairy_entered,
+                            self._undo_stack, self._current_board, self._zobrist_key)
+
+    def restore(self, snapshot):
+        """Return the game to a GameSnapshot (of this or any other game) in O(1), sharing its board until the next
+        move. Moves made since the snapshot are discarded; moves made before it can still be taken back with pop.
+        """
+        (self._state, self._players_turn, self._turn_count, self._player1_captures, self._player2_captures,
+         self._player1_special, self._player2_special, self._fairy_entered, self._undo_stack, self._current_board,
+         self._zobrist_key) = snapshot
+        self._shared = True
+
+    def fork(self, snapshot=None):
+        """Return a new, independent game in the current state (or in the state of snapshot, if given), for analysis
+        branches. The fork is made in O(1): it shares the board with this game until either one moves, which copies
+        it, and shares the undo records of the moves played so far for good.
+        """
+        game = ChessVar.__new__(ChessVar)
+        game.restore(snapshot if snapshot is not None else self.snapshot())
+        return game
+
+    def _unshare(self):
+        """Give the game its own copy of the board, before changing a shared one. The undo stack is never changed in
+        place, so it stays shared.
+        """
+        self._current_board = self._current_board.copy()
+        self._shared = False
 
-    def _initialize_fairy_pieces(self):
-        """Initialize fairy pieces without placing on board."""
-        self._wf = Falcon('WHITE', None, '𓅃')
-        self._wh = Hunter('WHITE', None, "↗")
-        self._bf = Falcon('BLACK', None, '𓅃')
-        self._bh = Hunter('BLACK', None, "↗")
+    def attacked_squares(self, color):
+        """Get the mask of squares attacked by the pieces of color ('WHITE' or 'BLACK'): bit (rank * 8 + file) is set
+        when at least one of them could capture on that square. The first call starts the board keeping attack counts,
+        which every later move then updates, so further calls cost O(1).
+        """
+        return self._get_attack_board().get_attacked(color)
+
+    def get_attack_count(self, color, position):
+        """Get how many pieces of color attack the square position (string such as 'e4'). Counted over a square holding
+        one of color's own pieces, this is how many times it is defended.
+        """
+        x, y = self.convert_to_coords(position)
+        return self._get_attack_board().get_attack_count(color, y * 8 + x)
+
+    def is_king_threatened(self, color):
+        """Get whether the king of color ('WHITE' or 'BLACK') is attacked by an opposing piece. There is no check rule
+        in this variant; this only tells the player the king could be captured on the opponent's next move.
+        """
+        board = self._get_attack_board()
+        opponent = 'BLACK' if color == 'WHITE' else 'WHITE'
+        return bool(board.get_bitboard(color, KING) & board.get_attacked(opponent))
 
     def get_game_state(self):
         """Get the current state of the game."""
@@ -344,13 +1002,22 @@ class ChessVar:
         return self._players_turn
 
     def set_players_turn(self, player):
-        """Set the current player's turn."""
+        """Set the current player's turn, keeping the Zobrist key in step with the side to move."""
+        if player != self._players_turn:
+            self._zobrist_key ^= ZOBRIST_BLACK_TO_MOVE
         self._players_turn = player
 
     def get_turn_count(self):
         """Get the number of turns."""
         return self._turn_count
 
+    def get_counters(self):
+        """Get the game's counters as a tuple: (turn count, player 1 captures, player 2 captures, player 1 special
+        pieces entered, player 2 special pieces entered, FAIRY_BITS of the fairy pieces entered).
+        """
+        return (self._turn_count, self._player1_captures, self._player2_captures, self._player1_special,
+                self._player2_special, self._fairy_entered)
+
     def make_move(self, moved_from, moved_to):
         """Method that allows player to make a move on the board; parameters accepted are strings representing position
         moved from and position moved to.
@@ -362,135 +1029,311 @@ class ChessVar:
             - Game has already been won
 
         Otherwise, returns True, indicated move is made, any captured pieces are removed, game state is updated if
-        necessary, and whose turn it is is updated.
+        necessary, and whose turn it is is updated. Use try_move to find out why a move was rejected.
+        """
+        return not self.try_move(moved_from, moved_to)
+
+    def try_move(self, moved_from, moved_to, validate_only=False):
+        """Method checking a move given as strings like make_move, and making it unless validate_only is True. Returns
+        the MoveError saying why the move is rejected, or MoveError.OK (which is false) if it is legal. Never raises
+        for bad input, so a UI can cheaply pre-validate a move with validate_only.
         """
 
         # Checks status of game
-        if self._state == 'WHITE_WON' or self._state == 'BLACK_WON':
-            return False
+        if self._state != 'UNFINISHED':
+            return MoveError.GAME_OVER
+
+        # Converts string positions to square indexes, checking they are on the board
+        try:
+            from_square = SQUARE_INDEX.get(moved_from)
+            to_square = SQUARE_INDEX.get(moved_to)
+        except TypeError:       # An unhashable position, such as a list
+            return MoveError.MALFORMED_SQUARE
+        if from_square is None:
+            from_square, error = self._parse_position(moved_from)
+            if error:
+                return error
+        if to_square is None:
+            to_square, error = self._parse_position(moved_to)
+            if error:
+                return error
+
+        error = self._check_move(from_square, to_square)
+        if error or validate_only:
+            return error
+
+        self._apply_move(from_square, to_square)
+        return MoveError.OK  # move completed
+
+    def _parse_position(self, position):
+        """Method converting a position string that is not a plain square name to a square index, the way
+        convert_to_coords reads it. Returns (square index, MoveError.OK), or (None, the MoveError) if it cannot be read
+        or is off the board.
+        """
+        try:
+            x, y = self.convert_to_coords(position)
+        except (KeyError, ValueError, IndexError, TypeError):
+            return None, MoveError.MALFORMED_SQUARE
+        if x not in range(8) or y not in range(8):
+            return None, MoveError.OFF_BOARD
+        return y * 8 + x, MoveError.OK
+
+    def _check_move(self, from_square, to_square):
+        """Method checking if the current player may move the piece on from_square to to_square (square indexes).
+        Assumes the game is not over. Returns the MoveError saying why the move is illegal, or MoveError.OK.
+        """
+        board = self._current_board
+        color = self._players_turn
 
-        # Converts string position to tuple of coordinates
-        moved_from_coords = self.convert_to_coords(moved_from)
-        moved_to_coords = self.convert_to_coords(moved_to)
+        # Check if the square being moved from contains a piece belonging to the current player
+        code = board.get_piece_code(from_square)
+        if code < 0:
+            return MoveError.EMPTY_SQUARE
+        if code >> 3 != COLOR_INDEX[color]:
+            return MoveError.WRONG_COLOR
 
-        # Checks if moved_from and moved_to position are on board:
-        if moved_from_coords[0] not in range(8) or moved_to_coords[1] not in range(8):
-            return False
-        if moved_to_coords[0] not in range(8) or moved_to_coords[1] not in range(8):
-            return False
+        # Check if the moved-to space is occupied by the player's own piece
+        to_bit = 1 << to_square
+        if board.get_occupied(color) & to_bit:
+            return MoveError.OWN_PIECE_ON_TARGET
 
-        # Allows Board object's current board to be referenced
-        board = self._current_board.get_board()
+        # Checks if move is legal by looking up the moved-to square in the piece's precomputed move mask
+        piece_type = code & 7
+        if not MOVE_MASKS[piece_type, color][from_square] & to_bit:
+            return MoveError.ILLEGAL_OFFSET
 
-        # Check if the moved-to space is occupied by the player's own piece
-        if board[moved_to_coords[1]][moved_to_coords[0]] is not None:
-            moved_to_color = board[moved_to_coords[1]][moved_to_coords[0]].get_color()
-            if self._players_turn == moved_to_color:
-                return False
+        if piece_type == PAWN:
+            return self._check_pawn_move(from_square, to_square, color)
 
-        # Check if the square being moved from contains a piece belonging to the current player
-        if board[moved_from_coords[1]][moved_from_coords[0]] is None:
-            return False
+        # Checks that no piece stands in the way of a sliding move with one lookup in the between-square table
+        if BETWEEN[from_square][to_square] & board.get_occupied():
+            return MoveError.PATH_BLOCKED
 
-        piece_color = board[moved_from_coords[1]][moved_from_coords[0]].get_color()
-        if piece_color != self._players_turn:
-            return False
+        return MoveError.OK
+
+    def _apply_move(self, from_square, to_square):
+        """Method making an already validated move: moves the piece, handles any capture, and updates the game state
+        and whose turn it is. Returns the captured piece, or None.
+        """
+        if self._shared:
+            self._unshare()
+        color = self._players_turn
+        color_index = COLOR_INDEX[color]
+
+        # Moves piece to new board position, sets old position to empty
+        piece_keys = ZOBRIST_PIECES[self._current_board.get_piece_code(from_square)]
+        self._zobrist_key ^= piece_keys[from_square] ^ piece_keys[to_square]
+        moved_to_piece = self._current_board.move_piece(from_square, to_square)
+
+        # Checks for capture. If the captured piece is not a pawn, increments the player's capture count for fairy piece
+        # eligibility.
+        if moved_to_piece is not None:
+            captured_type = moved_to_piece.get_type()
+            self._zobrist_key ^= ZOBRIST_PIECES[(1 - color_index) * 8 + captured_type][to_square]
+            if captured_type != PAWN:
+                capture_keys = ZOBRIST_CAPTURES[color_index]
+                if color == 'WHITE':
+                    self._zobrist_key ^= capture_keys[self._player1_captures] ^ capture_keys[self._player1_captures + 1]
+                    self._player1_captures += 1
+                else:
+                    self._zobrist_key ^= capture_keys[self._player2_captures] ^ capture_keys[self._player2_captures + 1]
+                    self._player2_captures += 1
 
-        # Checks if move is legal
-        piece = board[moved_from_coords[1]][moved_from_coords[0]]  # Obtains piece object at current position
-        piece_legal_moves = piece.get_legal_moves()
+            # Updates game status if necessary, sets to current player won if King was captured
+            if captured_type == KING:
+                self._state = f'{color}_WON'
 
-        row_from, column_from = moved_from_coords
-        row_to, column_to = moved_to_coords
+        self._end_turn()
+        return moved_to_piece
 
-        # Calculates if move is legal by obtaining difference between moved_to coordinates from moved from coordinates;
-        # checks if difference coordinates is in legal moves list. If not, move is not valid and returns False
-        row_diff = row_to - row_from
-        column_diff = column_to - column_from
+    def _end_turn(self):
+        """Method updating whose turn it is after a successful move; increments the turn count when changing to white."""
+        self._zobrist_key ^= ZOBRIST_BLACK_TO_MOVE
+        if self._players_turn == 'WHITE':
+            self._players_turn = 'BLACK'
+        else:
+            self._players_turn = 'WHITE'
+            self._turn_count += 1
 
-        diff_coords = row_diff, column_diff
+    def push(self, move):
+        """Method making a Move (as yielded by generate_moves) and recording how to undo it on the undo stack, so that
+        pop can take it back without copying the game. Returns False, leaving the game unchanged, if the move is not
+        legal; otherwise returns True.
+        """
+        if self._state != 'UNFINISHED':
+            return False
 
-        if diff_coords in piece_legal_moves:
+        # Undo record: everything the move may change apart from the board itself
+        record = (move, None, self._players_turn, self._turn_count, self._player1_captures, self._player2_captures,
+                  self._player1_special, self._player2_special, self._fairy_entered, self._state, self._zobrist_key)
 
-            #Checks for capture and, if found, removes the captured piece, placing it in the player's capture list. 
-            #Verifies if the piece in the destination spot belongs to the opponent, making it eligible for capture. 
-            #If the captured piece is not a pawn, increments the player's capture count for fairy piece eligibility.
-            moved_to_piece = board[moved_to_coords[1]][moved_to_coords[0]]
-            if moved_to_piece is not None:
-                if isinstance(piece, Pawn):  # Since Pawn can only capture diagonally, not ahead
-                    return False
-                else:
-                    if self._players_turn != moved_to_piece.get_color():
-                        moved_to_piece.set_captured()
-                        if not isinstance(moved_to_piece, Pawn):
-                            if self._players_turn == 'WHITE':
-                                self._player1_captures += 1
-                            else:
-                                self._player2_captures += 1
-
-                    # Updates game status if necessary, sets to current payer won if King was captured :
-                    if isinstance(moved_to_piece, King):
-                        self._state = (f'{self._players_turn}_WON')
-
-            # Moves piece to new board position, sets old position to empty
-            board[moved_to_coords[1]][moved_to_coords[0]] = piece
-            board[moved_from_coords[1]][moved_from_coords[0]] = None
-
-            # If pawn piece moved, increments turn count
-            if isinstance(piece, Pawn):
-                piece.set_number_moves()
-
-            # Update player turn only if move was successful
-            if self._players_turn == 'WHITE':
-                self._players_turn = 'BLACK'
-            else:
-                self._players_turn = 'WHITE'
-                self._turn_count += 1
-
-            return True  # move completed
-
-        # if piece is Pawn and move not in legal moves, checks if capture is possible; if move is diagonal in front
-        # and there is no piece there, return False. If there is an opposing player's piece, it can be captured and
-        # returns True
-        if isinstance(piece, Pawn) and piece.get_color() == 'WHITE':
-            if diff_coords in [(-1, 1), (1, 1)]:
-                if board[moved_to_coords[1]][moved_to_coords[0]] is not None:
-                    if board[moved_to_coords[1]][moved_to_coords[0]].get_color() == 'BLACK':
-                        board[moved_to_coords[1]][moved_to_coords[0]] = piece
-                        board[moved_from_coords[1]][moved_from_coords[0]] = None
-                        self._players_turn = 'BLACK'
-                        return True
+        if move.fairy is not None:
+            if self._check_entry(move.fairy, move.to_square):
                 return False
-
-        if isinstance(piece, Pawn) and piece.get_color() == 'BLACK':
-            if diff_coords in [(-1, -1), (1, -1)]:
-                if board[moved_to_coords[1]][moved_to_coords[0]] is not None:
-                    if board[moved_to_coords[1]][moved_to_coords[0]].get_color() == 'WHITE':
-                        board[moved_to_coords[1]][moved_to_coords[0]] = piece
-                        board[moved_from_coords[1]][moved_from_coords[0]] = None
-                        self._players_turn = 'WHITE'
-                        return True
+            self._apply_entry(move.fairy, move.to_square)
+        else:
+            if self._check_move(move.from_square, move.to_square):
                 return False
-        return False
+            captured = self._apply_move(move.from_square, move.to_square)
+            if captured is not None:
+                record = (move, captured) + record[2:]
+
+        self._undo_stack = (record, self._undo_stack)
+        return True
+
+    def pop(self):
+        """Method taking back the last move made with push, restoring the board, turn, capture counters, and game
+        state. Returns the Move taken back. Raises IndexError if there is no move to take back.
+        """
+        if self._undo_stack is None:
+            raise IndexError('pop from an empty undo stack')
+        if self._shared:
+            self._unshare()
+        record, self._undo_stack = self._undo_stack
+        (move, captured, self._players_turn, self._turn_count, self._player1_captures, self._player2_captures,
+         self._player1_special, self._player2_special, self._fairy_entered, self._state, self._zobrist_key) = record
+
+        board = self._current_board
+        if move.fairy is not None:
+            board.remove_piece(move.to_square)
+        else:
+            board.move_piece(move.to_square, move.from_square)
+            if captured is not None:
+                board.place_piece(captured, move.to_square)
+        return move
+
+    def _check_pawn_move(self, from_square, to_square, color):
+        """Method applying the pawn's extra rules to a move already in its move mask: pawn moves straight ahead only
+        onto an empty square (2 squares only from its starting rank, over an empty square), and only moves diagonally
+        when capturing an opposing piece. Returns the MoveError saying why the move is not allowed, or MoveError.OK.
+        """
+        occupied = self._current_board.get_occupied()
+        is_capture = occupied & (1 << to_square)
+        if from_square % 8 == to_square % 8:
+            if is_capture or BETWEEN[from_square][to_square] & occupied:
+                return MoveError.PAWN_BLOCKED
+            if abs(to_square - from_square) == 16 and from_square // 8 != PAWN_START_RANK[color]:
+                return MoveError.PAWN_DOUBLE_STEP
+            return MoveError.OK
+        if not is_capture:
+            return MoveError.PAWN_NOT_CAPTURING
+        return MoveError.OK
+
+    def _can_enter_fairy_piece(self, color):
+        """Method checking if player has captured enough major pieces to enter another fairy piece. Must have at least 1
+        captured to enter first fairy piece and at least 2 captured to enter second. Returns True if eligible.
+        """
+        if color == 'WHITE':
+            captures, special = self._player1_captures, self._player1_special
+        else:
+            captures, special = self._player2_captures, self._player2_special
+        return special < 2 and captures > special
+
+    def generate_moves(self):
+        """Generator yielding every legal Move for the player whose turn it is: each piece's moves (including pawn
+        double steps and diagonal captures), followed by every fairy piece entry the player is currently eligible for.
+        Moves are generated lazily from the board's bitboards, so the caller can stop early. The game must not be
+        changed while the generator is in use. Yields nothing once the game is over.
+        """
+        if self._state != 'UNFINISHED':
+            return
+
+        own = self._current_board.get_occupied(self._players_turn)
+        while own:
+            bit = own & -own
+            yield from self._generate_piece_moves(bit.bit_length() - 1)
+            own ^= bit
+
+        yield from self._generate_fairy_entries()
+
+    def generate_moves_from(self, position):
+        """Generator yielding every legal Move for the piece on the given square (string such as 'e2'). Yields nothing
+        if the position is not a square on the board, if the square does not hold a piece belonging to the player whose
+        turn it is, or if the game is over.
+        """
+        if self._state != 'UNFINISHED':
+            return
+
+        square, error = self._parse_position(position)
+        if error:
+            return
+        if self._current_board.get_occupied(self._players_turn) & (1 << square):
+            yield from self._generate_piece_moves(square)
+
+    def generate_captures(self):
+        """Generator yielding only the legal capturing Moves for the player whose turn it is, for searches that look
+        at captures alone. Yields nothing once the game is over.
+        """
+        if self._state != 'UNFINISHED':
+            return
+
+        board = self._current_board
+        color = self._players_turn
+        opponent = board.get_occupied('BLACK' if color == 'WHITE' else 'WHITE')
+        own = board.get_occupied(color)
+        while own:
+            bit = own & -own
+            from_square = bit.bit_length() - 1
+            # A piece's attacks are exactly the squares it can capture on, so no further legality check is needed
+            targets = board.get_piece_attacks(from_square) & opponent
+            while targets:
+                target_bit = targets & -targets
+                yield Move(from_square, target_bit.bit_length() - 1, None)
+                targets ^= target_bit
+            own ^= bit
+
+    def _generate_piece_moves(self, from_square):
+        """Generator yielding the legal moves of the current player's piece on from_square."""
+        board = self._current_board
+        color = self._players_turn
+        own = board.get_occupied(color)
+        if board.get_piece_code(from_square) & 7 != PAWN:
+            # The piece's attacks already stop at the first piece in each direction
+            targets = board.get_piece_attacks(from_square) & ~own
+            while targets:
+                bit = targets & -targets
+                yield Move(from_square, bit.bit_length() - 1, None)
+                targets ^= bit
+            return
+
+        targets = MOVE_MASKS[PAWN, color][from_square] & ~own
+        while targets:
+            bit = targets & -targets
+            to_square = bit.bit_length() - 1
+            if not self._check_pawn_move(from_square, to_square, color):
+                yield Move(from_square, to_square, None)
+            targets ^= bit
+
+    def _generate_fairy_entries(self):
+        """Generator yielding every fairy piece entry available to the current player: each fairy piece not yet entered,
+        onto each empty square of the player's home ranks, when the player is eligible.
+        """
+        color = self._players_turn
+        if not self._can_enter_fairy_piece(color):
+            return
+
+        empty = HOME_RANKS[color] & ~self._current_board.get_occupied()
+        for fairy, (fairy_color, _) in FAIRY_TYPES.items():
+            if fairy_color != color or self._fairy_entered & FAIRY_BITS[fairy]:
+                continue
+            squares = empty
+            while squares:
+                bit = squares & -squares
+                yield Move(None, bit.bit_length() - 1, fairy)
+                squares ^= bit
 
     def convert_to_coords(self, moving_position):
-        """Method to convert position from string argument to coordinate representation. Utilizes dictionary of
-        corresponding alphabetical:numerical values to change alphabetical character to numerical representation.
+        """Method to convert position from string argument to coordinate representation. Looks square names up in the
+        precomputed SQUARE_INDEX and SQUARE_COORDS tables, and the file letter of anything else in FILE_INDEX.
         Parameters are string value of moving position, called by 'make_move' method. Returns a tuple of coordinate values.
         """
 
-        alpha_num_dict = {
-            'a' : 0,
-            'b' : 1,
-            'c' : 2,
-            'd' : 3,
-            'e' : 4,
-            'f' : 5,
-            'g' : 6,
-            'h' : 7,
-        }
+        square = SQUARE_INDEX.get(moving_position)
+        if square is not None:
+            return SQUARE_COORDS[square]
 
-        x = alpha_num_dict[moving_position[0]]
+        # Not a square name: read it the same way, which may give coordinates off the board
+        x = FILE_INDEX[moving_position[0]]
         y = int(moving_position[1])
         y -= 1  # Because list indices start at 0
 
@@ -503,76 +1346,109 @@ class ChessVar:
 
         Returns False if fairy piece is not allowed to enter board at that time/position.
 
-        Otherwise, returns True.
+        Otherwise, returns True. Use try_enter_fairy_piece to find out why an entry was rejected.
 
         Must check: Game status, if it is that players turn, if position on board is open, if position is player's
         home rank, if player is qualified to enter fairy piece.
         """
+        return not self.try_enter_fairy_piece(type, entry_position)
 
-        # Checks status of game, returns False if game is over
-        if self._state == 'WHITE_WON' or self._state == 'BLACK_WON':
-            return False
-
-        # Converts type entered to Piece object
-        if type == 'F':
-            fairy_piece = self._wf
-        if type == 'f':
-            fairy_piece = self._bf
-        if type == 'H':
-            fairy_piece = self._wh
-        if type == 'h':
-            fairy_piece = self._bh
-
-        # Changes entry position to coordinates
-        entry_position = self.convert_to_coords(entry_position)
+    def try_enter_fairy_piece(self, type, entry_position, validate_only=False):
+        """Method checking a fairy piece entry given as strings like enter_fairy_piece, and making it unless
+        validate_only is True. Returns the MoveError saying why the entry is rejected, or MoveError.OK (which is false)
+        if it is legal. Never raises for bad input.
+        """
 
+        # Checks status of game
+        if self._state != 'UNFINISHED':
+            return MoveError.GAME_OVER
+
+        # Checks for an unknown (or unhashable) type
+        try:
+            if type not in FAIRY_TYPES:
+                return MoveError.UNKNOWN_FAIRY
+        except TypeError:
+            return MoveError.UNKNOWN_FAIRY
+
+        # Changes entry position to a square index, checking it is on the board
+        try:
+            entry_square = SQUARE_INDEX.get(entry_position)
+        except TypeError:       # An unhashable position, such as a list
+            return MoveError.MALFORMED_SQUARE
+        if entry_square is None:
+            entry_square, error = self._parse_position(entry_position)
+            if error:
+                return error
+
+        error = self._check_entry(type, entry_square)
+        if error or validate_only:
+            return error
+
+        self._apply_entry(type, entry_square)
+        return MoveError.OK
+
+    def _get_fairy_piece(self, type):
+        """Method converting a fairy piece type ('F', 'f', 'H', 'h') to its Piece object."""
+        color, piece_type = FAIRY_TYPES[type]
+        return PIECE_POOL[COLOR_INDEX[color] * 8 + piece_type]
+
+    def _check_entry(self, type, entry_square):
+        """Method checking if the current player may enter the fairy piece type onto entry_square (square index).
+        Assumes the game is not over and type is a valid fairy piece type. Returns the MoveError saying why the entry
+        is illegal, or MoveError.OK.
+        """
         # Checks if it's that player's turn
-        if fairy_piece.get_color() != self._players_turn:
-            return False
-
-        # Checks if moved_to space is occupied; if so, returns False
-        board = self._current_board.get_board()
-        if board[entry_position[1]][entry_position[0]] is not None:
-            return False
-
-        # Checks if entry position is in player's home rank; if not, returns False
-        if self._players_turn == 'WHITE':
-            if entry_position[1] < 3:     # If y coordinate is over 2, not in white player's home rank
-                return False
+        if FAIRY_TYPES[type][0] != self._players_turn:
+            return MoveError.NOT_YOUR_FAIRY
 
-        if self._players_turn == 'BLACK':
-            if entry_position[1] > 7:
-                return False           # If y coordinate is less than 7, not in white player's home rank
+        # Checks if this fairy piece has already entered the game
+        if self._fairy_entered & FAIRY_BITS[type]:
+            return MoveError.FAIRY_ALREADY_ENTERED
 
-        # Checks if player has had major pieces captured. Must have at least 1 captured to enter first fairy piece and
-        # at least 2 captured to enter second
-        if self._players_turn == 'WHITE':
-            if self._player1_special == 0:
-                if self._player1_captures < 1:
-                    return False
-            else:
-                if self._player1_captures < 2:
-                    return False
+        # Checks if moved_to space is occupied
+        if self._current_board.get_occupied() & (1 << entry_square):
+            return MoveError.SQUARE_OCCUPIED
 
-        if self._players_turn == 'BLACK':
-            if self._player2_special == 0:
-                if self._player2_captures < 1:
-                    return False
-            else:
-                if self._player2_captures < 2:
-                    return False
+        # Checks if entry position is in player's two home ranks
+        if not HOME_RANKS[self._players_turn] & (1 << entry_square):
+            return MoveError.NOT_HOME_RANK
 
-        # If valid, piece is place on board at entry point
-        board[entry_position[1]][entry_position[0]] = fairy_piece
+        # Checks if player has had enough major pieces captured
+        if not self._can_enter_fairy_piece(self._players_turn):
+            return MoveError.NOT_ELIGIBLE
+        return MoveError.OK
 
-        # Update player turn, changes turn count if necessary (increments count when changing to white)
+    def _apply_entry(self, type, entry_square):
+        """Method entering an already validated fairy piece: places it on the board, records the entry, and updates
+        whose turn it is.
+        """
+        if self._shared:
+            self._unshare()
+        fairy_color, fairy_type = FAIRY_TYPES[type]
+        self._current_board.place_piece(self._get_fairy_piece(type), entry_square)
+        self._zobrist_key ^= ZOBRIST_PIECES[COLOR_INDEX[fairy_color] * 8 + fairy_type][entry_square]
+        self._zobrist_key ^= ZOBRIST_FAIRY_ENTERED[self._fairy_entered]
+        self._fairy_entered |= FAIRY_BITS[type]
+        self._zobrist_key ^= ZOBRIST_FAIRY_ENTERED[self._fairy_entered]
         if self._players_turn == 'WHITE':
-            self._players_turn = 'BLACK'
+            self._player1_special += 1
         else:
-            self._players_turn = 'WHITE'
-            self._turn_count += 1
+            self._player2_special += 1
 
-        return True
+        self._end_turn()
+
+
+# Snapshot of the start position, shared by every new game until it first moves; built by the first ChessVar()
+_start_snapshot = None
 
 
-game = ChessVar()
+def _get_start_snapshot():
+    """Returns the GameSnapshot of the start position that new games share, building it on first use."""
+    global _start_snapshot
+    if _start_snapshot is None:
+        game = ChessVar.__new__(ChessVar)
+        game._initialize_attributes()
+        game._initialize_pieces()
+        game._zobrist_key = game._compute_zobrist_key()
+        _start_snapshot = game.snapshot()
+    return _start_snapshot
@@ -0,0 +1,183 @@
+# Description: Vectorized NumPy evaluation of many ChessVar positions at once. Positions are packed into int8 arrays
+# (one board of signed piece codes per position, or one-hot planes per piece code), and material, mobility, fairy
+# piece availability, and king safety are computed for the whole batch with array operations instead of Python loops
+# over boards. Requires NumPy.
+
+from collections import namedtuple
+
+import numpy as np
+
+from ChessVar import ATTACK_MASKS, BETWEEN, KING, LINES, MOVE_MASKS, SLIDER_RAYS, GAME_STATES, COLOR_INDEX
+from engine import PIECE_VALUES
+
+# Positions evaluated per chunk, bounding the memory of the intermediate arrays
+CHUNK_SIZE = 8192
+
+# Score weights, in the same units as engine.PIECE_VALUES
+MOBILITY_WEIGHT = 4
+FAIRY_WEIGHT = 200
+KING_DANGER_WEIGHT = 25
+
+# A batch of packed positions. codes is (N, 64) uint8 of Board.get_square_codes (piece code + 1, or 0 if empty),
+# boards is (N, 8, 8) int8 of piece type + 1 (positive for white, negative for black, 0 if empty, rank 1 first), and
+# the rest are (N,) arrays: side to move (0 white, 1 black), turn count, each player's capture and special counts,
+# fairy entry bits, and GAME_STATES index.
+PackedPositions = namedtuple('PackedPositions', [
+    'codes', 'boards', 'side', 'turn_count', 'player1_captures', 'player2_captures', 'player1_special',
+    'player2_special', 'fairy_entered', 'state'])
+
+
+def _build_tables():
+    """Builds the lookup tables used by the batch operations, all indexed by square code (piece code + 1, 0 empty)."""
+    signed = np.zeros(17, dtype=np.int8)
+    values = np.zeros(17, dtype=np.int32)
+    for code in range(16):
+        sign = 1 if code < 8 else -1
+        signed[code + 1] = sign * ((code & 7) + 1)
+        values[code + 1] = sign * PIECE_VALUES[code & 7]
+
+    # attacks[square * 16 + code, color index * 64 + target] is 1 when the piece code on square attacks target; only
+    # pieces that do not slide, whose attacks cannot be blocked, are included
+    attacks = np.zeros((64 * 16, 128), dtype=np.float32)
+    for code in range(16):
+        if SLIDER_RAYS[code] is not None:
+            continue
+        for square in range(64):
+            mask = ATTACK_MASKS[code][square]
+            for target in range(64):
+                if mask >> target & 1:
+                    attacks[square * 16 + code, (code >> 3) * 64 + target] = 1
+
+    # king_zone[square, target] is 1 for the king's square and every square a king there could move to
+    king_zone = np.eye(64, dtype=np.float32)
+    for square in range(64):
+        mask = MOVE_MASKS[KING, 'WHITE'][square]
+        for target in range(64):
+            if mask >> target & 1:
+                king_zone[square, target] = 1
+    return signed, values, attacks, king_zone
+
+
+def _build_slide_tables():
+    """Builds the tables for sliding attacks. For each square, the (up to 27) squares sharing a line with it are listed
+    in line_targets[square], with line_between[square] holding the BETWEEN bitboard of the squares strictly between
+    the two. slides[square code * 64 + square] marks which of those targets the piece with that square code slides
+    toward from the square (padding entries are never marked). is_slider[square code] is True for sliding pieces.
+    """
+    line_targets = np.zeros((64, 27), dtype=np.intp)
+    line_between = np.zeros((64, 27), dtype=np.uint64)
+    slides = np.zeros((17 * 64, 27), dtype=bool)
+    is_slider = np.zeros(17, dtype=bool)
+    for square in range(64):
+        targets = [target for target in range(64) if LINES[square] >> target & 1]
+        for index, target in enumerate(targets):
+            line_targets[square, index] = target
+            line_between[square, index] = BETWEEN[square][target]
+            for code in range(16):
+                if SLIDER_RAYS[code] is not None:
+                    is_slider[code + 1] = True
+                    slides[(code + 1) * 64 + square, index] = bool(ATTACK_MASKS[code][square] >> target & 1)
+    return line_targets, line_between, slides, is_slider
+
+
+_SIGNED_CODES, _VALUES, _ATTACKS, _KING_ZONE = _build_tables()
+_LINE_TARGETS, _LINE_BETWEEN, _SLIDES, _IS_SLIDER = _build_slide_tables()
+_PIECE_CODES = np.arange(1, 17, dtype=np.uint8)
+
+
+def pack_positions(games):
+    """Packs a sequence of ChessVar games into a PackedPositions batch in one pass over the games."""
+    games = list(games)
+    count = len(games)
+    codes = np.frombuffer(b''.join(game.get_current_board(read_only=True).get_square_codes() for game in games),
+                          dtype=np.uint8).reshape(count, 64)
+    counters = np.array([game.get_counters() for game in games], dtype=np.int32).reshape(count, 6)
+    side = np.fromiter((COLOR_INDEX[game.get_players_turn()] for game in games), dtype=np.int8, count=count)
+    state = np.fromiter((GAME_STATES.index(game.get_game_state()) for game in games), dtype=np.int8, count=count)
+    return PackedPositions(codes, _SIGNED_CODES[codes].reshape(count, 8, 8), side, counters[:, 0], counters[:, 1],
+                           counters[:, 2], counters[:, 3], counters[:, 4], counters[:, 5], state)
+
+
+def to_planes(packed, out=None):
+    """Returns the batch as (N, 16, 8, 8) int8 one-hot planes, one per piece code (color index * 8 + piece type),
+    written into out if given. The result is a plain contiguous NumPy array, so it can be handed to other tools
+    without copying through the buffer protocol or DLPack.
+    """
+    codes = packed.codes
+    if out is None:
+        out = np.empty((len(codes), 16, 8, 8), dtype=np.int8)
+    np.equal(codes.reshape(-1, 1, 8, 8), _PIECE_CODES.reshape(1, 16, 1, 1), out=out, casting='unsafe')
+    return out
+
+
+def _attack_counts(codes):
+    """Returns (N, 128) float32 attack counts per square for a chunk of positions: columns 0-63 count white's
+    attackers of each square, columns 64-127 black's. Sliding pieces attack along each line up to and including the
+    first occupied square: for every sliding piece in the chunk at once, the squares on its lines are kept where the
+    BETWEEN bitboard of the squares on the way does not meet the occupied squares.
+    """
+    one_hot = np.equal(codes[:, :, None], _PIECE_CODES[None, None, :]).astype(np.float32)
+    counts = one_hot.reshape(len(codes), 64 * 16) @ _ATTACKS
+
+    positions, squares = np.nonzero(_IS_SLIDER[codes])
+    slider_codes = codes[positions, squares].astype(np.intp)
+    occupied = np.packbits(codes > 0, axis=1, bitorder='little').view('<u8').reshape(-1)
+    open_lines = (_LINE_BETWEEN[squares] & occupied[positions, None]) == 0
+    attacked = _SLIDES[slider_codes * 64 + squares] & open_lines
+    columns = (positions * 128 + (slider_codes - 1 >> 3) * 64)[:, None] + _LINE_TARGETS[squares]
+    counts += np.bincount(columns[attacked], minlength=len(codes) * 128).reshape(-1, 128)
+    return counts
+
+
+def evaluate_positions(packed, perspective='white'):
+    """Evaluates every position in a PackedPositions batch. Returns a dict of (N,) arrays: 'material' (white minus
+    black), 'mobility_white' / 'mobility_black' (squares attacked that do not hold one of the side's own pieces,
+    with sliding pieces blocked by the first piece in their way),
+    'fairy_white' / 'fairy_black' (fairy pieces the side has earned by captures but not yet entered), 'danger_white' /
+    'danger_black' (opposing attacks on the side's king and the squares around it), and 'score'. The score is from
+    white's point of view, or from the side to move's if perspective is 'side'.
+    """
+    codes = packed.codes
+    count = len(codes)
+    material = _VALUES[codes].sum(axis=1)
+
+    mobility = np.empty((2, count), dtype=np.int32)
+    danger = np.empty((2, count), dtype=np.float32)
+    for start in range(0, count, CHUNK_SIZE):
+        chunk = codes[start:start + CHUNK_SIZE]
+        attacks = _attack_counts(chunk)
+        white_attacks, black_attacks = attacks[:, :64], attacks[:, 64:]
+        white_pieces = (chunk >= 1) & (chunk <= 8)
+        black_pieces = chunk >= 9
+        mobility[0, start:start + CHUNK_SIZE] = ((white_attacks > 0) & ~white_pieces).sum(axis=1)
+        mobility[1, start:start + CHUNK_SIZE] = ((black_attacks > 0) & ~black_pieces).sum(axis=1)
+        white_zone = (chunk == KING + 1).astype(np.float32) @ _KING_ZONE
+        black_zone = (chunk == KING + 9).astype(np.float32) @ _KING_ZONE
+        danger[0, start:start + CHUNK_SIZE] = (white_zone * black_attacks).sum(axis=1)
+        danger[1, start:start + CHUNK_SIZE] = (black_zone * white_attacks).sum(axis=1)
+
+    fairy_white = np.clip(np.minimum(packed.player1_captures, 2) - packed.player1_special, 0, 2)
+    fairy_black = np.clip(np.minimum(packed.player2_captures, 2) - packed.player2_special, 0, 2)
+
+    score = (material + MOBILITY_WEIGHT * (mobility[0] - mobility[1]) + FAIRY_WEIGHT * (fairy_white - fairy_black)
+             - KING_DANGER_WEIGHT * (danger[0] - danger[1])).astype(np.float32)
+    if perspective == 'side':
+        score = np.where(packed.side == 0, score, -score)
+    elif perspective != 'white':
+        raise ValueError(f"perspective must be 'white' or 'side', not {perspective!r}")
+
+    return {
+        'material': material,
+        'mobility_white': mobility[0],
+        'mobility_black': mobility[1],
+        'fairy_white': fairy_white,
+        'fairy_black': fairy_black,
+        'danger_white': danger[0],
+        'danger_black': danger[1],
+        'score': score,
+    }
+
+
+def evaluate_games(games, perspective='white'):
+    """Packs and evaluates a sequence of ChessVar games. Returns the dict of evaluate_positions."""
+    return evaluate_positions(pack_positions(games), perspective)
@@ -0,0 +1,261 @@
+# Description: Microbenchmarks and perft suite for ChessVar. Measures moves validated per second, positions generated
+# per second, memory per live game, cold start (importing ChessVar in a fresh interpreter) and games created per
+# second, and counts perft nodes from the start position and from fairy piece positions. Results are written as JSON so runs can be compared, and --compare flags regressions against an earlier
+# run.
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from ChessVar import ChessVar, Move
+from perft import PERFT_EXPECTED, PERFT_POSITIONS, perft
+
+# Benchmarks where a lower value is better; higher is better for the rest
+LOWER_IS_BETTER = ('bytes_per_game', 'import_seconds')
+
+
+def _sample_games(count, seed, max_plies=120):
+    """Returns count games' move lists (as Move tuples), played at random from the start position."""
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        game = ChessVar()
+        moves = []
+        while game.get_game_state() == 'UNFINISHED' and len(moves) < max_plies:
+            move = rng.choice(list(game.generate_moves()))
+            game.push(move)
+            moves.append(move)
+        games.append(tuple(moves))
+    return games
+
+
+def _sample_positions(games, step=5):
+    """Returns the positions (ChessVar.to_position text) reached every step plies in the sample games."""
+    positions = []
+    for moves in games:
+        game = ChessVar()
+        for ply, move in enumerate(moves):
+            if ply % step == 0 and game.get_game_state() == 'UNFINISHED':
+                positions.append(game.to_position())
+            game.push(move)
+    return positions
+
+
+def bench_make_move(games, repeat=3):
+    """Times replaying the sample games from a new game through the string API (make_move / enter_fairy_piece).
+    Returns calls per second.
+    """
+    calls = [[move.get_arguments() for move in moves] for moves in games]
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for game_calls in calls:
+            game = ChessVar()
+            for arguments in game_calls:
+                if len(arguments[0]) == 1:
+                    game.enter_fairy_piece(*arguments)
+                else:
+                    game.make_move(*arguments)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return sum(map(len, calls)) / best
+
+
+def bench_validate(positions, seed, candidates=200, repeat=3):
+    """Times validating random candidate moves (legal and illegal) in the sample positions with push, taking back
+    the legal ones with pop. Returns moves validated per second.
+    """
+    rng = random.Random(seed)
+    games = [ChessVar.from_position(position) for position in positions]
+    moves = [[Move(rng.randrange(64), rng.randrange(64), None) for _ in range(candidates)] for _ in games]
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for game, game_moves in zip(games, moves):
+            for move in game_moves:
+                if game.push(move):
+                    game.pop()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(games) * candidates / best
+
+
+def bench_generate(positions, repeat=3):
+    """Times generating every legal move in the sample positions. Returns (positions per second, moves per second)."""
+    games = [ChessVar.from_position(position) for position in positions]
+    best = None
+    generated = 0
+    for _ in range(repeat):
+        generated = 0
+        start = time.perf_counter()
+        for game in games:
+            for _ in game.generate_moves():
+                generated += 1
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(games) / best, generated / best
+
+
+def bench_memory(count=1000):
+    """Returns the average bytes allocated per live ChessVar after its first move, over count games. A game that has
+    not moved yet shares the start position's board, so it would not show what a game in progress costs.
+    """
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    games = []
+    for _ in range(count):
+        game = ChessVar()
+        game.make_move('e2', 'e4')
+        games.append(game)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    del games
+    return allocated / count
+
+
+def bench_import(repeat=5):
+    """Returns the seconds taken to import ChessVar in a fresh interpreter (cold start), as the best of repeat runs less
+    the best time of an interpreter that imports nothing.
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+
+    def best_time(code):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-c', code], cwd=directory, check=True)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    return max(best_time('import ChessVar') - best_time('pass'), 0.0)
+
+
+def bench_create(count=10000, repeat=3):
+    """Times creating new games in the starting position. Returns games created per second."""
+    ChessVar()      # The first game builds the shared start position
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(count):
+            ChessVar()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return count / best
+
+
+def run_perft(depth):
+    """Runs perft to depths 1 through depth from each of PERFT_POSITIONS. Returns a dict of position name to a list
+    of {'depth', 'nodes', 'seconds', 'nodes_per_second'}.
+    """
+    results = {}
+    for name, position in PERFT_POSITIONS.items():
+        results[name] = []
+        for current in range(1, depth + 1):
+            game = ChessVar.from_position(position)
+            start = time.perf_counter()
+            nodes = perft(game, current)
+            elapsed = time.perf_counter() - start
+            results[name].append({'depth': current, 'nodes': nodes, 'seconds': elapsed,
+                                  'nodes_per_second': nodes / elapsed if elapsed else None})
+    return results
+
+
+def run_benchmarks(perft_depth=3, sample_games=20, seed=0):
+    """Runs every benchmark and the perft suite. Returns the results as a JSON-serializable dict."""
+    games = _sample_games(sample_games, seed)
+    positions = _sample_positions(games)
+    positions_per_second, moves_per_second = bench_generate(positions)
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'timestamp': time.time(),
+        'seed': seed,
+        'benchmarks': {
+            'make_move_calls_per_second': bench_make_move(games),
+            'moves_validated_per_second': bench_validate(positions, seed),
+            'positions_generated_per_second': positions_per_second,
+            'moves_generated_per_second': moves_per_second,
+            'bytes_per_game': bench_memory(),
+            'import_seconds': bench_import(),
+            'games_created_per_second': bench_create(),
+        },
+        'perft': run_perft(perft_depth),
+    }
+
+
+def check_perft_counts(current):
+    """Returns a list of problems found checking the perft counts of a run against PERFT_EXPECTED."""
+    problems = []
+    for name, runs in current['perft'].items():
+        expected = PERFT_EXPECTED.get(name, ())
+        for run in runs:
+            if run['depth'] <= len(expected) and expected[run['depth'] - 1] != run['nodes']:
+                problems.append(f"perft {name} depth {run['depth']}: expected {expected[run['depth'] - 1]}, "
+                                f"counted {run['nodes']}")
+    return problems
+
+
+def compare(baseline, current, tolerance=0.10):
+    """Returns a list of problems found comparing the current results with a baseline run: perft counts that differ,
+    and benchmarks more than tolerance (a fraction) worse. Higher is better for every benchmark not in LOWER_IS_BETTER.
+    """
+    problems = []
+    for name, value in current['benchmarks'].items():
+        old = baseline.get('benchmarks', {}).get(name)
+        if not old:
+            continue
+        change = (old - value) / old if name not in LOWER_IS_BETTER else (value - old) / old
+        if change > tolerance:
+            problems.append(f'{name}: {old:.1f} -> {value:.1f} ({change:.0%} worse)')
+    for name, runs in current['perft'].items():
+        old_runs = {run['depth']: run['nodes'] for run in baseline.get('perft', {}).get(name, [])}
+        for run in runs:
+            old = old_runs.get(run['depth'])
+            if old is not None and old != run['nodes']:
+                problems.append(f"perft {name} depth {run['depth']}: {old} -> {run['nodes']} nodes")
+    return problems
+
+
+def main(argv=None):
+    """Command line entry point: runs the benchmarks, prints the JSON results, and optionally saves them and compares
+    them with an earlier run. Exits with status 1 if a perft count differs from PERFT_EXPECTED or the comparison finds
+    a regression.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark ChessVar move validation and generation.')
+    parser.add_argument('--perft-depth', type=int, default=3, choices=range(1, 6))
+    parser.add_argument('--games', type=int, default=20, help='number of random sample games')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the JSON results to this file')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.perft_depth, args.games, args.seed)
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(text)
+
+    wrong = check_perft_counts(results)
+    for problem in wrong:
+        print('WRONG', problem, file=sys.stderr)
+    if args.compare:
+        with open(args.compare) as file:
+            problems = compare(json.load(file), results, args.tolerance)
+        for problem in problems:
+            print('REGRESSION', problem, file=sys.stderr)
+        return 1 if problems or wrong else 0
+    return 1 if wrong else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,269 @@
+# Description: Position-keyed caching around move selection: an opening book built from archived game records, and an
+# LRU cache of evaluated or solved positions. Both are saved as files of fixed-size records sorted by Zobrist key,
+# which are memory-mapped and binary searched when loaded, so a fresh worker process starts warm without reading
+# the files into memory.
+
+import mmap
+import os
+import random
+import struct
+from collections import OrderedDict
+
+from ChessVar import ChessVar
+from engine import Engine, WIN_SCORE, MAX_PLY
+from records import decode_move, encode_move, iter_records
+
+# Book file record: Zobrist key, packed move, number of games that played it from that position
+_BOOK_ENTRY = struct.Struct('<QHI')
+
+# Cache file record: Zobrist key, depth searched, score, packed best move
+_CACHE_ENTRY = struct.Struct('<QhiH')
+
+# Depth stored for a solved position (a forced king capture was found), whose result holds at any depth
+SOLVED_DEPTH = 0x7FFF
+
+
+class MappedTable:
+    """Class for a read-only file of fixed-size records sorted by their first field, a 64-bit key. The file is
+    memory-mapped and searched in place.
+    """
+
+    def __init__(self, path, entry):
+        """Maps the file at path, made of records in the struct.Struct entry format."""
+        self._entry = entry
+        self._size = os.path.getsize(path)
+        if self._size % entry.size:
+            raise ValueError(f'{path} is not a whole number of {entry.size}-byte records')
+        self._count = self._size // entry.size
+        self._data = b''
+        if self._count:
+            with open(path, 'rb') as file:
+                self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        """Returns the number of records."""
+        return self._count
+
+    def __iter__(self):
+        """Iterates over every record, as tuples, in key order."""
+        for index in range(self._count):
+            yield self._entry.unpack_from(self._data, index * self._entry.size)
+
+    def find(self, key):
+        """Returns the list of records (as tuples) whose key is key."""
+        entry = self._entry
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if entry.unpack_from(self._data, middle * entry.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        found = []
+        while low < self._count:
+            record = entry.unpack_from(self._data, low * entry.size)
+            if record[0] != key:
+                break
+            found.append(record)
+            low += 1
+        return found
+
+    def close(self):
+        """Unmaps the file."""
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+
+def _write_table(path, entry, records):
+    """Writes records (tuples in the entry format) sorted by key to path, replacing it atomically."""
+    temporary = f'{path}.tmp'
+    with open(temporary, 'wb') as file:
+        for record in sorted(records):
+            file.write(entry.pack(*record))
+    os.replace(temporary, path)
+
+
+class OpeningBook:
+    """Class for an opening book: for each early position (by Zobrist key), the moves played from it in archived
+    games and how often.
+    """
+
+    def __init__(self):
+        """Initializes an empty book."""
+        self._moves = {}        # Zobrist key -> {packed move: count}
+        self._table = None      # Loaded book file, if any
+
+    @classmethod
+    def from_records(cls, sources, max_plies=16, winners_only=False):
+        """Builds a book from the first max_plies moves of every game in the record files (paths or binary file
+        objects) in sources. With winners_only, only the moves of the side that went on to win are counted.
+        """
+        book = cls()
+        for source in sources:
+            for record in iter_records(source, decode=False):
+                book.add_game(record.moves[:max_plies], record.state if winners_only else None)
+        return book
+
+    def add_game(self, moves, winner_state=None):
+        """Adds a game's moves (Move objects or packed moves) to the book, up to the first illegal move. If
+        winner_state ('WHITE_WON' or 'BLACK_WON') is given, only the winning side's moves are counted.
+        """
+        game = ChessVar()
+        for move in moves:
+            if isinstance(move, int):
+                move = decode_move(move)
+            key = game.get_zobrist_key()
+            counted = winner_state is None or winner_state == f'{game.get_players_turn()}_WON'
+            if not game.push(move):
+                break
+            if counted:
+                counts = self._moves.setdefault(key, {})
+                code = encode_move(move)
+                counts[code] = counts.get(code, 0) + 1
+
+    def get_moves(self, game):
+        """Returns a dict of the book's moves (Move objects) from the game's position to how often each was played."""
+        key = game.get_zobrist_key()
+        counts = dict(self._moves.get(key, ()))
+        if self._table is not None:
+            for _, code, count in self._table.find(key):
+                counts[code] = counts.get(code, 0) + count
+        return {decode_move(code): count for code, count in counts.items()}
+
+    def choose(self, game, rng=None):
+        """Returns a book move for the game's position, picked at random weighted by how often it was played (or the
+        most played move if rng is None), or None if the position is not in the book.
+        """
+        moves = self.get_moves(game)
+        if not moves:
+            return None
+        if rng is None:
+            return max(moves, key=moves.get)
+        return rng.choices(list(moves), weights=list(moves.values()))[0]
+
+    def save(self, path):
+        """Saves the book (including any loaded book file) to path as a file of sorted fixed-size records."""
+        merged = {}
+        if self._table is not None:
+            for key, code, count in self._table:
+                merged[key, code] = count
+        for key, counts in self._moves.items():
+            for code, count in counts.items():
+                merged[key, code] = merged.get((key, code), 0) + count
+        _write_table(path, _BOOK_ENTRY, ((key, code, count) for (key, code), count in merged.items()))
+
+    @classmethod
+    def load(cls, path):
+        """Returns a book backed by the memory-mapped book file at path. Games added afterwards are kept in memory."""
+        book = cls()
+        book._table = MappedTable(path, _BOOK_ENTRY)
+        return book
+
+
+class PositionCache:
+    """Class for an LRU-bounded cache of evaluated positions: for each Zobrist key, the depth searched, the score, and
+    the best move. It can be backed by a memory-mapped cache file from an earlier run; entries found there are
+    promoted into the LRU part on use.
+    """
+
+    def __init__(self, capacity=1 << 16):
+        """Initializes an empty cache holding at most capacity entries in memory."""
+        self._capacity = capacity
+        self._entries = OrderedDict()   # Zobrist key -> (depth, score, packed move), least recently used first
+        self._table = None
+
+    def __len__(self):
+        """Returns the number of entries held in memory."""
+        return len(self._entries)
+
+    def get(self, key):
+        """Returns the (depth, score, Move) cached for the Zobrist key, or None."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        elif self._table is not None:
+            found = self._table.find(key)
+            if not found:
+                return None
+            entry = found[0][1:]
+            self._put(key, entry)
+        else:
+            return None
+        depth, score, code = entry
+        return depth, score, decode_move(code)
+
+    def put(self, key, depth, score, move):
+        """Caches a result for the Zobrist key, unless a deeper result is already cached. A forced win or loss is
+        stored as solved, so it is used whatever depth is asked for later.
+        """
+        if abs(score) > WIN_SCORE - MAX_PLY:
+            depth = SOLVED_DEPTH
+        old = self._entries.get(key)
+        if old is not None and old[0] > depth:
+            return
+        self._put(key, (depth, score, encode_move(move)))
+
+    def _put(self, key, entry):
+        """Stores an entry as most recently used, evicting the least recently used entry if the cache is full."""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._capacity:
+            self._entries.popitem(last=False)
+
+    def save(self, path):
+        """Saves the cache (including any loaded cache file) to path as a file of sorted fixed-size records."""
+        merged = {}
+        if self._table is not None:
+            for key, depth, score, code in self._table:
+                merged[key] = (depth, score, code)
+        for key, entry in self._entries.items():
+            if key not in merged or merged[key][0] <= entry[0]:
+                merged[key] = entry
+        _write_table(path, _CACHE_ENTRY, ((key,) + entry for key, entry in merged.items()))
+
+    @classmethod
+    def load(cls, path, capacity=1 << 16):
+        """Returns a cache backed by the memory-mapped cache file at path."""
+        cache = cls(capacity)
+        cache._table = MappedTable(path, _CACHE_ENTRY)
+        return cache
+
+
+class MoveSelector:
+    """Class wrapping move selection with the position caches: a book move is played if the position is in the
+    opening book, then a cached result searched at least as deep as asked for, and only otherwise is the engine run
+    (and its result cached).
+    """
+
+    def __init__(self, engine=None, book=None, cache=None, seed=None):
+        """Initializes the selector. Book moves are picked at random weighted by popularity if seed is given,
+        otherwise the most played book move is used.
+        """
+        self._engine = engine if engine is not None else Engine()
+        self._book = book
+        self._cache = cache if cache is not None else PositionCache()
+        self._rng = random.Random(seed) if seed is not None else None
+
+    def get_cache(self):
+        """Returns the PositionCache used, so it can be saved."""
+        return self._cache
+
+    def select(self, game, time_limit=1.0, depth=64):
+        """Returns the Move to play in the game's position, or None if there is no legal move."""
+        if self._book is not None:
+            move = self._book.choose(game, self._rng)
+            if move is not None:
+                return move
+
+        key = game.get_zobrist_key()
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] >= depth:
+            return cached[2]
+
+        result = self._engine.search(game, time_limit, depth)
+        if result.move is not None and result.depth > 0:
+            if cached is None or result.depth >= cached[0]:
+                self._cache.put(key, result.depth, result.score, result.move)
+            else:
+                return cached[2]
+        return result.move
@@ -0,0 +1,262 @@
+# Description: Alpha-beta search engine for ChessVar. Searches with negamax alpha-beta and iterative deepening under a
+# wall-clock budget, ordering captures first, and extends the search with captures only (quiescence) at the leaves.
+# The game is won by capturing the king, so a king capture is scored as a win directly; there is no check or
+# checkmate to detect.
+
+import time
+from collections import namedtuple
+
+from ChessVar import KING, QUEEN, KNIGHT, BISHOP, ROOK, PAWN, HUNTER, FALCON
+from transposition import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+
+# Material value of each piece type, indexed by piece type code. The king is not counted: losing it ends the game.
+PIECE_VALUES = [0] * 8
+PIECE_VALUES[QUEEN] = 900
+PIECE_VALUES[ROOK] = 500
+PIECE_VALUES[BISHOP] = 330
+PIECE_VALUES[KNIGHT] = 320
+PIECE_VALUES[PAWN] = 100
+PIECE_VALUES[HUNTER] = 400
+PIECE_VALUES[FALCON] = 400
+
+# Score of capturing the king. Wins found sooner score higher: a win in n plies scores WIN_SCORE - n.
+WIN_SCORE = 1000000
+MAX_PLY = 1000
+
+# Move ordering priorities
+_KING_CAPTURE_ORDER = 1 << 30
+_TABLE_MOVE_ORDER = 1 << 29
+_CAPTURE_ORDER = 1 << 20
+
+SearchResult = namedtuple('SearchResult', ['move', 'score', 'depth', 'nodes', 'elapsed'])
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the wall-clock budget for the move runs out."""
+
+
+def evaluate(game):
+    """Returns the static score of the position from the point of view of the player whose turn it is: the
+    difference in material on the board.
+    """
+    board = game.get_current_board(read_only=True)
+    score = 0
+    for piece_type in (QUEEN, ROOK, BISHOP, KNIGHT, PAWN, HUNTER, FALCON):
+        count = board.get_bitboard('WHITE', piece_type).bit_count() - board.get_bitboard('BLACK', piece_type).bit_count()
+        score += PIECE_VALUES[piece_type] * count
+    return score if game.get_players_turn() == 'WHITE' else -score
+
+
+def _score_to_table(score, ply):
+    """Converts a win score relative to the root into one relative to this node, so it can be stored and reused."""
+    if score > WIN_SCORE - MAX_PLY:
+        return score + ply
+    if score < -WIN_SCORE + MAX_PLY:
+        return score - ply
+    return score
+
+
+def _score_from_table(score, ply):
+    """Converts a win score stored relative to its node back into one relative to the root."""
+    if score > WIN_SCORE - MAX_PLY:
+        return score - ply
+    if score < -WIN_SCORE + MAX_PLY:
+        return score + ply
+    return score
+
+
+class Engine:
+    """Class for the search engine. Keeps a transposition table across searches, so positions reached again through
+    a different move order, or on the next move, reuse earlier results.
+    """
+
+    def __init__(self, table_size=1 << 18):
+        """Initializes the engine with a transposition table of table_size entries."""
+        self._table = TranspositionTable(table_size)
+        self._nodes = 0
+        self._deadline = None
+
+    def get_best_move(self, game, time_limit=1.0, max_depth=64):
+        """Returns the best Move found for the player whose turn it is, or None if there is no legal move."""
+        return self.search(game, time_limit, max_depth).move
+
+    def search(self, game, time_limit=1.0, max_depth=64):
+        """Searches the position with iterative deepening until max_depth is completed or time_limit seconds have
+        passed, whichever is first. The game is left as it was found. Returns a SearchResult holding the best move and
+        its score from the deepest completed iteration, the depth completed, the nodes searched, and the time taken.
+        """
+        start = time.perf_counter()
+        self._deadline = start + time_limit
+        self._nodes = 0
+
+        moves = list(game.generate_moves())
+        best_move = moves[0] if moves else None
+        best_score = 0
+        completed = 0
+
+        for depth in range(1, max_depth + 1):
+            try:
+                score, move = self._search_root(game, moves, depth, best_move)
+            except SearchTimeout:
+                break
+            best_score, best_move, completed = score, move, depth
+            if abs(score) > WIN_SCORE - MAX_PLY:
+                break
+
+        return SearchResult(best_move, best_score, completed, self._nodes, time.perf_counter() - start)
+
+    def score_move(self, game, move, depth):
+        """Searches the position after the legal Move to depth - 1 plies with no time limit, as one root move of a
+        depth-ply search. The game is left as it was found. Returns the move's score from the point of view of the
+        player making it, and the nodes searched.
+        """
+        self._deadline = float('inf')
+        self._nodes = 0
+        game.push(move)
+        try:
+            score = -self._negamax(game, depth - 1, -WIN_SCORE - 1, WIN_SCORE + 1, 1)
+        finally:
+            game.pop()
+        return score, self._nodes
+
+    def _search_root(self, game, moves, depth, previous_best):
+        """Searches every root move to the given depth, trying the previous iteration's best move first. Returns the
+        best (score, move).
+        """
+        alpha = -WIN_SCORE - 1
+        best_move = None
+        for move in self._order_moves(game, moves, previous_best):
+            game.push(move)
+            try:
+                score = -self._negamax(game, depth - 1, -WIN_SCORE - 1, -alpha, 1)
+            finally:
+                game.pop()
+            if score > alpha:
+                alpha, best_move = score, move
+        self._table.store(game.get_zobrist_key(), depth, alpha, EXACT, best_move)
+        return alpha, best_move
+
+    def _negamax(self, game, depth, alpha, beta, ply):
+        """Negamax alpha-beta search of the position to the given depth. Returns its score from the point of view of
+        the player whose turn it is.
+        """
+        self._nodes += 1
+        if not self._nodes & 1023 and time.perf_counter() > self._deadline:
+            raise SearchTimeout
+
+        # The previous move captured the king of the player to move
+        if game.get_game_state() != 'UNFINISHED':
+            return -WIN_SCORE + ply
+
+        if depth <= 0:
+            return self._quiesce(game, alpha, beta, ply)
+
+        key = game.get_zobrist_key()
+        entry = self._table.probe(key)
+        table_move = None
+        if entry is not None:
+            _, entry_depth, entry_score, flag, table_move = entry
+            if entry_depth >= depth:
+                entry_score = _score_from_table(entry_score, ply)
+                if flag == EXACT:
+                    return entry_score
+                if flag == LOWER_BOUND and entry_score >= beta:
+                    return entry_score
+                if flag == UPPER_BOUND and entry_score <= alpha:
+                    return entry_score
+
+        moves = self._order_moves(game, list(game.generate_moves()), table_move)
+        if not moves:
+            return 0
+
+        # Capturing the king wins on the spot; no need to search further
+        if self._is_king_capture(game, moves[0]):
+            return WIN_SCORE - ply - 1
+
+        original_alpha = alpha
+        best_score = -WIN_SCORE - 1
+        best_move = None
+        for move in moves:
+            game.push(move)
+            try:
+                score = -self._negamax(game, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                game.pop()
+            if score > best_score:
+                best_score, best_move = score, move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        if best_score <= original_alpha:
+            flag = UPPER_BOUND
+        elif best_score >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self._table.store(key, depth, _score_to_table(best_score, ply), flag, best_move)
+        return best_score
+
+    def _quiesce(self, game, alpha, beta, ply):
+        """Searches captures only until the position is quiet, so the static evaluation is never taken in the middle
+        of an exchange. Returns the score from the point of view of the player whose turn it is.
+        """
+        self._nodes += 1
+        if not self._nodes & 1023 and time.perf_counter() > self._deadline:
+            raise SearchTimeout
+
+        if game.get_game_state() != 'UNFINISHED':
+            return -WIN_SCORE + ply
+
+        stand_pat = evaluate(game)
+        if stand_pat >= beta:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        captures = self._order_moves(game, list(game.generate_captures()), None)
+        if captures and self._is_king_capture(game, captures[0]):
+            return WIN_SCORE - ply - 1
+
+        for move in captures:
+            game.push(move)
+            try:
+                score = -self._quiesce(game, -beta, -alpha, ply + 1)
+            finally:
+                game.pop()
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+        return alpha
+
+    def _is_king_capture(self, game, move):
+        """Returns True if the move captures the opposing king."""
+        if move.fairy is not None:
+            return False
+        target = game.get_current_board(read_only=True).get_piece(move.to_square)
+        return target is not None and target.get_type() == KING
+
+    def _order_moves(self, game, moves, table_move):
+        """Returns the moves sorted best-first: king captures, then the transposition table's best move, then other
+        captures by most valuable victim / least valuable attacker, then fairy piece entries and quiet moves.
+        """
+        board = game.get_current_board(read_only=True)
+
+        def order(move):
+            if move == table_move:
+                return _TABLE_MOVE_ORDER
+            if move.fairy is not None:
+                return 1
+            target = board.get_piece(move.to_square)
+            if target is None:
+                return 0
+            target_type = target.get_type()
+            if target_type == KING:
+                return _KING_CAPTURE_ORDER
+            attacker_type = board.get_piece(move.from_square).get_type()
+            return _CAPTURE_ORDER + PIECE_VALUES[target_type] * 16 - PIECE_VALUES[attacker_type] // 16
+
+        moves.sort(key=order, reverse=True)
+        return moves
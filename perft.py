@@ -0,0 +1,240 @@
+# Description: Perft node counting for ChessVar: counts the leaf positions of the legal move tree to a fixed depth,
+# which checks move generation (including fairy piece entries) against known counts and measures its speed. Divide
+# and root move scoring can be split across a process pool: each worker is sent the binary position
+# (ChessVar.to_position(binary=True)) and one packed root move, and results stream back as each root move finishes.
+# check_incremental replays random games to check the state kept up to date move by move against a full recount.
+
+import argparse
+import os
+import random
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from ChessVar import ChessVar
+from engine import Engine
+from records import encode_move, decode_move
+
+# Result for one root move of a split divide or search: the Move, its perft count (or None), and its search score and
+# nodes searched (or None)
+RootResult = namedtuple('RootResult', ['move', 'nodes', 'score'])
+
+# Positions the perft suite runs from: the start position and positions where fairy pieces can enter or have entered
+PERFT_POSITIONS = {
+    'start': 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w 0 0/0 - UNFINISHED',
+    'fairy-eligible': 'r1bqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKB1R w 3 1/1 - UNFINISHED',
+    'fairy-second': 'rhbqk1nr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RHBQK1NR w 5 2/2 Hh UNFINISHED',
+    'fairy-entered': 'rhbqk1fr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RHBQK1FR b 7 2/3 FHfh UNFINISHED',
+}
+
+# Verified perft counts of each of PERFT_POSITIONS at depths 1 to 4. Any change to them means move generation changed.
+PERFT_EXPECTED = {
+    'start': (20, 400, 8902, 197742),
+    'fairy-eligible': (31, 990, 32813, 1089630),
+    'fairy-second': (25, 626, 17407, 483634),
+    'fairy-entered': (20, 401, 9444, 222008),
+}
+
+
+def perft(game, depth):
+    """Returns the number of leaf positions reached by playing every legal move sequence of the given depth from the
+    game's position. The game is left as it was found.
+    """
+    if depth <= 0:
+        return 1
+    moves = list(game.generate_moves())
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        game.push(move)
+        nodes += perft(game, depth - 1)
+        game.pop()
+    return nodes
+
+
+def divide(game, depth):
+    """Returns a dict mapping each legal root move (as a string such as 'e2e4' or 'F@d1') to the perft count of the
+    position after it, to the given depth. Comparing divides narrows a wrong perft count down to a single move.
+    """
+    counts = {}
+    for move in list(game.generate_moves()):
+        game.push(move)
+        counts[str(move)] = perft(game, depth - 1)
+        game.pop()
+    return counts
+
+
+def perft_position(position, depth):
+    """Returns the perft count to the given depth from a position in ChessVar.to_position format, or one of the
+    names in PERFT_POSITIONS.
+    """
+    return perft(ChessVar.from_position(PERFT_POSITIONS.get(position, position)), depth)
+
+
+def check_perft(max_depth=4):
+    """Returns a list of problems found running perft to depths 1 through max_depth (at most 4) from each of
+    PERFT_POSITIONS: every count that differs from PERFT_EXPECTED. An empty list means move generation is unchanged.
+    """
+    problems = []
+    for name, expected in PERFT_EXPECTED.items():
+        for depth, nodes in enumerate(expected[:max_depth], 1):
+            counted = perft_position(name, depth)
+            if counted != nodes:
+                problems.append(f'perft {name} depth {depth}: expected {nodes}, counted {counted}')
+    return problems
+
+
+def _incremental_problem(game, ply):
+    """Returns a problem found comparing the game's incrementally kept attack counts and Zobrist key with ones
+    recomputed from scratch, or None if they match.
+    """
+    board = game.get_current_board()
+    recounted = board.copy()
+    recounted._track_attacks()
+    if recounted._attacks != board._attacks:
+        return f'attack counts differ from a recount at ply {ply} in {game.to_position()}'
+    if game.get_zobrist_key() != game._compute_zobrist_key():
+        return f'Zobrist key differs from a recount at ply {ply} in {game.to_position()}'
+    return None
+
+
+def check_incremental(games=50, max_plies=200, seed=0):
+    """Returns a list of problems found replaying random games (moves, captures, and fairy entries, with some moves
+    taken back with pop): every position where the attack counts or Zobrist key kept up to date move by move differ
+    from ones recomputed from scratch. An empty list means they always matched.
+    """
+    rng = random.Random(seed)
+    problems = []
+    for _ in range(games):
+        game = ChessVar()
+        game.get_current_board().get_attacked('WHITE')      # Starts the board keeping attack counts
+        ply = 0
+        while ply < max_plies and game.get_game_state() == 'UNFINISHED':
+            moves = list(game.generate_moves())
+            if not moves:
+                break
+            game.push(rng.choice(moves))
+            ply += 1
+            if ply > 1 and rng.random() < 0.2:
+                game.pop()
+                ply -= 1
+            problem = _incremental_problem(game, ply)
+            if problem is not None:
+                problems.append(problem)
+                break
+    return problems
+
+
+def _play_root_move(position, code):
+    """Returns a ChessVar loaded from the binary position with the packed root move played."""
+    game = ChessVar.from_position(position)
+    game.push(decode_move(code))
+    return game
+
+
+def _perft_task(position, code, depth):
+    """Worker task: returns (packed move, perft count to depth - 1 after the move, None)."""
+    return code, perft(_play_root_move(position, code), depth - 1), None
+
+
+def _score_task(position, code, depth, table_size):
+    """Worker task: returns (packed move, None, (score, nodes searched) of the move searched to depth)."""
+    game = ChessVar.from_position(position)
+    return code, None, Engine(table_size).score_move(game, decode_move(code), depth)
+
+
+def _split_root(game, task, arguments, workers):
+    """Generator running task(position, packed move, *arguments) for every legal root move of the game, across a
+    pool of worker processes (workers=None uses one per CPU; workers=0 runs them in this process). Yields a
+    RootResult for each root move as it finishes.
+    """
+    position = game.to_position(binary=True)
+    codes = [encode_move(move) for move in game.generate_moves()]
+    if workers == 0:
+        results = (task(position, code, *arguments) for code in codes)
+        for code, nodes, score in results:
+            yield RootResult(decode_move(code), nodes, score)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(task, position, code, *arguments) for code in codes]
+        for future in as_completed(futures):
+            code, nodes, score = future.result()
+            yield RootResult(decode_move(code), nodes, score)
+
+
+def parallel_divide(game, depth, workers=None):
+    """Generator yielding a RootResult with the perft count to the given depth (counting the root move) after each
+    legal root move, including fairy piece entries, in the order they finish. The root moves are split across a
+    process pool as in _split_root. The game is not changed.
+    """
+    return _split_root(game, _perft_task, (depth,), workers)
+
+
+def parallel_perft(game, depth, workers=None):
+    """Returns the perft count to the given depth, with the root moves split across a process pool."""
+    if depth <= 1:
+        return perft(game, depth)
+    return sum(result.nodes for result in parallel_divide(game, depth, workers))
+
+
+def parallel_scores(game, depth, workers=None, table_size=1 << 16):
+    """Generator yielding a RootResult with (score, nodes searched) for each legal root move, searched to the given
+    depth with no time limit, in the order they finish. Each worker searches with its own Engine of table_size
+    entries. The root moves are split across a process pool as in _split_root. The game is not changed.
+    """
+    return _split_root(game, _score_task, (depth, table_size), workers)
+
+
+def main(argv=None):
+    """Command line entry point: runs perft (optionally per root move) or scores every root move, split across worker
+    processes, printing each root move's result as it finishes and then the total and throughput. With --check, instead
+    checks every position's counts against PERFT_EXPECTED and runs check_incremental, exiting with status 1 if either
+    finds a problem.
+    """
+    parser = argparse.ArgumentParser(description='Parallel perft and root move search for ChessVar.')
+    parser.add_argument('position', nargs='?', default='start',
+                        help='a name from PERFT_POSITIONS or a position in ChessVar.to_position format')
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--scores', action='store_true', help='score each root move with the engine instead')
+    parser.add_argument('--check', action='store_true',
+                        help='check the counts of every position to --depth (at most 4) against PERFT_EXPECTED, and '
+                             'the incrementally kept attack counts and Zobrist keys against a recount')
+    args = parser.parse_args(argv)
+
+    if args.check:
+        problems = check_perft(args.depth) + check_incremental()
+        for problem in problems:
+            print('WRONG', problem, file=sys.stderr)
+        if not problems:
+            print(f'perft counts match to depth {min(args.depth, 4)}; attack counts and Zobrist keys match a recount')
+        return 1 if problems else 0
+
+    game = ChessVar.from_position(PERFT_POSITIONS.get(args.position, args.position))
+    started = time.perf_counter()
+    total = 0
+    best = None
+    if args.scores:
+        for result in parallel_scores(game, args.depth, args.workers):
+            score, nodes = result.score
+            total += nodes
+            if best is None or score > best.score[0]:
+                best = result
+            print(f'{result.move} {score} ({nodes} nodes)', flush=True)
+    else:
+        for result in parallel_divide(game, args.depth, args.workers):
+            total += result.nodes
+            print(f'{result.move} {result.nodes}', flush=True)
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    if best is not None:
+        print(f'best {best.move} {best.score[0]}')
+    print(f'total {total} nodes in {elapsed:.2f}s ({total / elapsed:.0f} nodes/s, '
+          f'{args.workers if args.workers is not None else os.cpu_count()} workers)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,187 @@
+# Description: Opt-in instrumentation for ChessVar and Board. While profiling is enabled, the hot-path methods of both
+# classes are replaced by wrappers that time each call and count moves and fairy entries attempted, accepted, and
+# rejected (by MoveError reason); disabling puts the original methods back. Nothing is wrapped while profiling is
+# disabled, so it costs nothing then. A Profiler's counters can be read from a running process as a plain snapshot dict.
+
+import time
+from functools import wraps
+
+from ChessVar import ChessVar, Board
+
+# Methods timed while profiling, as (class, method name, phase name). The timings are inclusive: a phase's time
+# includes the time of the phases it calls. try_move and try_enter_fairy_piece look plain square names such as 'e2'
+# up inline, with a single dict lookup counted in their own time; only other position strings reach _parse_position,
+# which is what the position_parsing phase times.
+TIMED_METHODS = (
+    (ChessVar, 'try_move', 'try_move'),
+    (ChessVar, 'try_enter_fairy_piece', 'try_enter_fairy_piece'),
+    (ChessVar, 'push', 'push'),
+    (ChessVar, 'pop', 'pop'),
+    (ChessVar, '_parse_position', 'position_parsing'),
+    (ChessVar, '_check_move', 'legality'),
+    (ChessVar, '_check_entry', 'entry_legality'),
+    (ChessVar, '_apply_move', 'apply_move'),
+    (ChessVar, '_apply_entry', 'apply_entry'),
+    (ChessVar, '_end_turn', 'turn_bookkeeping'),
+    (Board, 'move_piece', 'board_move'),
+    (Board, 'place_piece', 'board_place'),
+    (Board, 'remove_piece', 'board_remove'),
+    (Board, '_add_attacks', 'attack_update'),
+    (Board, '_remove_attacks', 'attack_update'),
+)
+
+_active = None          # The enabled Profiler, or None
+_originals = []         # (class, method name, original function) replaced by enable
+
+
+class Profiler:
+    """Class collecting per-phase timers, event counters, and size statistics."""
+
+    def __init__(self):
+        """Initializes a profiler with nothing recorded."""
+        self.reset()
+
+    def reset(self):
+        """Clears everything recorded."""
+        self._timers = {}       # Phase name -> [calls, total nanoseconds]
+        self._counters = {}     # Event name -> count
+        self._sizes = {}        # Statistic name -> [samples, total, largest]
+
+    def count(self, name, amount=1):
+        """Adds amount to the named counter."""
+        self._counters[name] = self._counters.get(name, 0) + amount
+
+    def observe(self, name, size):
+        """Records one sample of the named size statistic."""
+        stats = self._sizes.get(name)
+        if stats is None:
+            self._sizes[name] = [1, size, size]
+        else:
+            stats[0] += 1
+            stats[1] += size
+            if size > stats[2]:
+                stats[2] = size
+
+    def add_time(self, name, nanoseconds):
+        """Records one call of the named phase taking nanoseconds."""
+        timer = self._timers.get(name)
+        if timer is None:
+            self._timers[name] = [1, nanoseconds]
+        else:
+            timer[0] += 1
+            timer[1] += nanoseconds
+
+    def snapshot(self):
+        """Returns a dict of everything recorded so far: 'timers' maps each phase to its calls, total seconds, and
+        mean microseconds per call; 'counters' maps each event to its count; 'sizes' maps each size statistic to its
+        samples, mean, and largest value.
+        """
+        return {
+            'timers': {name: {'calls': calls, 'seconds': total / 1e9, 'mean_us': total / calls / 1e3}
+                       for name, (calls, total) in self._timers.items()},
+            'counters': dict(self._counters),
+            'sizes': {name: {'samples': samples, 'mean': total / samples, 'max': largest}
+                      for name, (samples, total, largest) in self._sizes.items()},
+        }
+
+
+def _timed(profiler, name, function):
+    """Returns function wrapped to record each call's time under the phase name."""
+    clock = time.perf_counter_ns
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        started = clock()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            profiler.add_time(name, clock() - started)
+    return wrapper
+
+
+def _counted_try(profiler, prefix, try_method):
+    """Returns try_move or try_enter_fairy_piece wrapped to count attempts, acceptances, and rejections by reason.
+    Calls with validate_only are counted separately, under prefix + '_validated'.
+    """
+    @wraps(try_method)
+    def wrapper(self, *args, **kwargs):
+        error = try_method(self, *args, **kwargs)
+        if kwargs.get('validate_only', len(args) > 2 and args[2]):
+            profiler.count(f'{prefix}_validated')
+            return error
+        profiler.count(f'{prefix}_attempted')
+        if error:
+            profiler.count(f'{prefix}_rejected:{error.name}')
+        else:
+            profiler.count(f'{prefix}_accepted')
+        return error
+    return wrapper
+
+
+def _counted_push(profiler, push):
+    """Returns push wrapped to count accepted and rejected moves."""
+    @wraps(push)
+    def wrapper(self, move):
+        accepted = push(self, move)
+        profiler.count('push_accepted' if accepted else 'push_rejected')
+        return accepted
+    return wrapper
+
+
+def _counted_generate_moves(profiler, generate_moves):
+    """Returns generate_moves wrapped to record how many moves each call yields (up to where the caller stopped)."""
+    @wraps(generate_moves)
+    def wrapper(self):
+        yielded = 0
+        try:
+            for move in generate_moves(self):
+                yielded += 1
+                yield move
+        finally:
+            profiler.observe('moves_generated', yielded)
+    return wrapper
+
+
+def enable(profiler=None):
+    """Starts profiling every ChessVar and Board in this process into profiler (a new Profiler if None), and returns
+    the profiler. If profiling is already enabled, returns the profiler in use.
+    """
+    global _active
+    if _active is not None:
+        return _active
+    profiler = profiler if profiler is not None else Profiler()
+
+    def replace(cls, name, wrapper):
+        original = cls.__dict__[name]
+        _originals.append((cls, name, original))
+        setattr(cls, name, wrapper(original))
+
+    for cls, name, phase in TIMED_METHODS:
+        replace(cls, name, lambda original, phase=phase: _timed(profiler, phase, original))
+    # The counting wrappers go outside the timers, so the time spent finding a rejection reason is not counted
+    replace(ChessVar, 'try_move', lambda original: _counted_try(profiler, 'moves', original))
+    replace(ChessVar, 'try_enter_fairy_piece', lambda original: _counted_try(profiler, 'fairy', original))
+    replace(ChessVar, 'push', lambda original: _counted_push(profiler, original))
+    replace(ChessVar, 'generate_moves', lambda original: _counted_generate_moves(profiler, original))
+    _active = profiler
+    return profiler
+
+
+def disable():
+    """Stops profiling, restoring the original methods. Returns the profiler that was in use, or None."""
+    global _active
+    while _originals:
+        cls, name, original = _originals.pop()
+        setattr(cls, name, original)
+    profiler, _active = _active, None
+    return profiler
+
+
+def get_profiler():
+    """Returns the enabled Profiler, or None if profiling is disabled."""
+    return _active
+
+
+def snapshot():
+    """Returns the enabled profiler's snapshot dict, or None if profiling is disabled."""
+    return _active.snapshot() if _active is not None else None
@@ -0,0 +1,169 @@
+# Description: Compact binary format for ChessVar moves and game records, with a streaming writer and reader.
+#
+# A move packs into 16 bits: bits 0-5 hold the to-square index, bits 6-11 the from-square index, bit 12 is set for a
+# fairy piece entry, and bits 13-14 hold the fairy piece type (F, H, f, h). A record file starts with an 8-byte
+# header (magic b'CVGR', format version, padding); each game record is then a 3-byte length prefix (number of moves
+# as an unsigned 16-bit integer, and the final game state as one byte) followed by that many little-endian 16-bit
+# moves.
+
+import mmap
+import struct
+import sys
+from array import array
+from collections import namedtuple
+
+from ChessVar import ChessVar, Move
+
+MAGIC = b'CVGR'
+VERSION = 1
+
+_FILE_HEADER = struct.Struct('<4sB3x')
+_RECORD_HEADER = struct.Struct('<HB')
+
+_DROP_FLAG = 1 << 12
+_FAIRY_CODES = {'F': 0, 'H': 1, 'f': 2, 'h': 3}
+_FAIRY_TYPES = 'FHfh'
+_STATE_CODES = {'UNFINISHED': 0, 'WHITE_WON': 1, 'BLACK_WON': 2}
+_STATES = ('UNFINISHED', 'WHITE_WON', 'BLACK_WON')
+
+# A game read from a record file: moves is a tuple of Move (or an array of packed moves when read with decode=False)
+# and state is the final game state.
+GameRecord = namedtuple('GameRecord', ['moves', 'state'])
+
+
+def encode_move(move):
+    """Returns the Move packed into a 16-bit integer."""
+    if move.fairy is not None:
+        return _DROP_FLAG | _FAIRY_CODES[move.fairy] << 13 | move.to_square
+    return move.from_square << 6 | move.to_square
+
+
+def decode_move(code):
+    """Returns the Move packed into the 16-bit integer by encode_move."""
+    if code & _DROP_FLAG:
+        return Move(None, code & 63, _FAIRY_TYPES[code >> 13 & 3])
+    return Move(code >> 6 & 63, code & 63, None)
+
+
+class RecordWriter:
+    """Class for writing game records to a binary file object. The file header is written first if the file is
+    empty, so records can be appended to an existing record file.
+    """
+
+    def __init__(self, file):
+        """Initializes the writer for a file object opened for binary writing or appending."""
+        self._file = file
+        if file.tell() == 0:
+            file.write(_FILE_HEADER.pack(MAGIC, VERSION))
+
+    def write(self, moves, state='UNFINISHED'):
+        """Writes one game record: its moves (Move objects or packed moves) in order, and the final game state."""
+        codes = array('H', (move if isinstance(move, int) else encode_move(move) for move in moves))
+        if len(codes) > 0xFFFF:
+            raise ValueError('game record holds at most 65535 moves')
+        if sys.byteorder == 'big':
+            codes.byteswap()
+        self._file.write(_RECORD_HEADER.pack(len(codes), _STATE_CODES[state]))
+        self._file.write(codes.tobytes())
+
+    def flush(self):
+        """Flushes the underlying file."""
+        self._file.flush()
+
+
+def _check_header(data):
+    """Raises ValueError if the data does not start with a record file header."""
+    if len(data) < _FILE_HEADER.size:
+        raise ValueError('not a game record file: too short')
+    magic, version = _FILE_HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError('not a game record file: bad magic')
+    if version != VERSION:
+        raise ValueError(f'unsupported game record version {version}')
+
+
+def _decode_codes(payload, decode):
+    """Returns the moves held in a record's payload bytes."""
+    codes = array('H', payload)
+    if sys.byteorder == 'big':
+        codes.byteswap()
+    if decode:
+        return tuple(map(decode_move, codes))
+    return codes
+
+
+def iter_records(source, decode=True, use_mmap=True, strict=True):
+    """Generator yielding a GameRecord for each game in a record file, one at a time, without loading the whole file.
+    source is a path or a binary file object. A path is memory-mapped unless use_mmap is False. With decode=False,
+    moves are yielded as an array of packed moves, which is cheaper for bulk analytics. Raises ValueError on a
+    malformed or truncated file. With strict=False, a record with an unknown game state is yielded with state None
+    instead, so the records after it can still be read.
+    """
+    if isinstance(source, (str, bytes)) or hasattr(source, '__fspath__'):
+        with open(source, 'rb') as file:
+            if use_mmap:
+                try:
+                    data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:      # An empty file cannot be mapped
+                    data = b''
+                try:
+                    yield from _iter_buffer(data, decode, strict)
+                finally:
+                    if isinstance(data, mmap.mmap):
+                        data.close()
+            else:
+                yield from _iter_file(file, decode, strict)
+    else:
+        yield from _iter_file(source, decode, strict)
+
+
+def _decode_state(state, strict):
+    """Returns the game state stored as the state byte of a record, or None for an unknown byte if strict is False."""
+    if state < len(_STATES):
+        return _STATES[state]
+    if strict:
+        raise ValueError(f'unknown game state {state} in game record')
+    return None
+
+
+def _iter_buffer(data, decode, strict):
+    """Generator yielding the GameRecords held in an in-memory or memory-mapped buffer."""
+    _check_header(data)
+    offset = _FILE_HEADER.size
+    end = len(data)
+    while offset < end:
+        if offset + _RECORD_HEADER.size > end:
+            raise ValueError('truncated game record header')
+        count, state = _RECORD_HEADER.unpack_from(data, offset)
+        offset += _RECORD_HEADER.size
+        if offset + 2 * count > end:
+            raise ValueError('truncated game record')
+        yield GameRecord(_decode_codes(data[offset:offset + 2 * count], decode), _decode_state(state, strict))
+        offset += 2 * count
+
+
+def _iter_file(file, decode, strict):
+    """Generator yielding the GameRecords read incrementally from a binary file object."""
+    _check_header(file.read(_FILE_HEADER.size))
+    while True:
+        header = file.read(_RECORD_HEADER.size)
+        if not header:
+            return
+        if len(header) < _RECORD_HEADER.size:
+            raise ValueError('truncated game record header')
+        count, state = _RECORD_HEADER.unpack(header)
+        payload = file.read(2 * count)
+        if len(payload) < 2 * count:
+            raise ValueError('truncated game record')
+        yield GameRecord(_decode_codes(payload, decode), _decode_state(state, strict))
+
+
+def replay(record):
+    """Returns a new ChessVar with the record's moves played in order. Raises ValueError at the first illegal move."""
+    game = ChessVar()
+    for ply, move in enumerate(record.moves):
+        if isinstance(move, int):
+            move = decode_move(move)
+        if not game.push(move):
+            raise ValueError(f'illegal move {move} at ply {ply}')
+    return game
@@ -0,0 +1,64 @@
+# Description: Board renderer for spectator feeds. A BoardRenderer follows one board: its first render is the whole
+# board (Board.render), and each later render lists only the squares that changed since the one before, either as
+# 'square=glyph' words for logs or as ANSI cursor moves that redraw just those squares on a terminal. Output is
+# built as one string, to be written with a single call.
+
+import sys
+
+from ChessVar import RENDER_STYLES, SQUARE_NAMES
+
+
+class BoardRenderer:
+    """Class rendering successive states of a board, emitting only the changes after the first full render."""
+
+    def __init__(self, style='unicode', ansi=False, origin=(1, 1)):
+        """Initializes the renderer. style is 'unicode' or 'ascii' as for Board.render. With ansi, changes are
+        rendered as ANSI escape sequences redrawing the changed squares of a board drawn with its header line at
+        the 1-based terminal (line, column) origin; otherwise as a line of 'square=glyph' words such as 'e2=. e4=♙'.
+        """
+        self._glyphs = RENDER_STYLES[style]
+        self._style = style
+        self._ansi = ansi
+        self._origin = origin
+        self._last = None       # Square codes at the last render
+
+    def reset(self):
+        """Forgets the last render, so the next render draws the whole board again."""
+        self._last = None
+
+    def render(self, board):
+        """Returns the text for the board's current state: the whole board on the first call (or after reset), and
+        after that only the squares changed since the previous call ('' if none changed).
+        """
+        squares = board.get_square_codes()
+        last = self._last
+        self._last = bytes(squares)
+        if last is None:
+            text = board.render(self._style)
+            if self._ansi:
+                line, column = self._origin
+                return f'\x1b[{line};{column}H' + text.replace('\n', f'\n\x1b[{column}G')
+            return text
+        if last == squares:
+            return ''
+
+        glyphs = self._glyphs
+        parts = []
+        for square in range(64):
+            code = squares[square]
+            if code != last[square]:
+                if self._ansi:
+                    line, column = self._origin
+                    # The header takes the first line; rank 8 is drawn first and each square is 2 characters wide
+                    parts.append(f'\x1b[{line + 8 - square // 8};{column + 2 + 2 * (square % 8)}H{glyphs[code]}')
+                else:
+                    parts.append(f'{SQUARE_NAMES[square]}={glyphs[code]}')
+        if self._ansi:
+            return ''.join(parts)
+        return ' '.join(parts) + '\n'
+
+    def write(self, board, file=None):
+        """Writes render(board) to file (standard output by default) in a single call, if there is anything to write."""
+        text = self.render(board)
+        if text:
+            (file or sys.stdout).write(text)
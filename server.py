@@ -0,0 +1,192 @@
+# Description: Asyncio game host serving many ChessVar games from one process over a line-based local socket protocol.
+#
+# Each request is one line of space-separated words and gets one response line, 'OK ...' or 'ERR <reason>'. A rejected
+# move or fairy entry gets 'ERR illegal <why>', where <why> is its MoveError name such as own-piece-on-target:
+#
+#     NEW                       -> OK <game id>
+#     MOVE <id> <from> <to>     -> OK <game state>          (make_move)
+#     CHECK <id> <from> <to>    -> OK <game state>          (validates a move without making it)
+#     FAIRY <id> <type> <pos>   -> OK <game state>          (enter_fairy_piece)
+#     STATE <id>                -> OK <game state> <player's turn> <turn count>
+#     POSITION <id>             -> OK <ChessVar.to_position text>
+#     MOVES <id>                -> OK <legal moves, e.g. e2e4 F@d1>
+#     CLOSE <id>                -> OK
+#     QUIT                      -> OK, then the connection is closed
+#
+# Games left idle longer than the idle timeout are evicted. A bounded number of requests are processed at once, and
+# each response is drained to the client before that connection's next request is read, so slow clients and
+# request bursts push back on the sender instead of queueing up in memory.
+
+import argparse
+import asyncio
+import itertools
+import sys
+import time
+
+from ChessVar import ChessVar, MoveError
+
+MAX_LINE = 1024
+
+
+def _response(game, error):
+    """Returns the response line for a move or fairy piece entry that gave the MoveError."""
+    if error in (MoveError.MALFORMED_SQUARE, MoveError.OFF_BOARD):
+        return 'ERR bad-square'
+    if error:
+        return f"ERR illegal {error.name.lower().replace('_', '-')}"
+    return f'OK {game.get_game_state()}'
+
+
+class GameSession:
+    """Class for one hosted game: the ChessVar, the lock serializing requests to it, and when it was last used."""
+
+    __slots__ = ('game', 'lock', 'last_used')
+
+    def __init__(self):
+        """Initializes a session holding a new game."""
+        self.game = ChessVar()
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+
+class GameHost:
+    """Class for the game host: a registry of game sessions keyed by game id, and the request handling for them."""
+
+    def __init__(self, max_games=100000, idle_timeout=1800.0, max_inflight=256):
+        """Initializes an empty host. At most max_games games are hosted at once, games idle for idle_timeout seconds
+        are evicted, and at most max_inflight requests are processed at the same time.
+        """
+        self._sessions = {}
+        self._ids = itertools.count(1)
+        self._max_games = max_games
+        self._idle_timeout = idle_timeout
+        self._inflight = asyncio.Semaphore(max_inflight)
+
+    def __len__(self):
+        """Returns the number of games hosted."""
+        return len(self._sessions)
+
+    def evict_idle(self, now=None):
+        """Removes every game not used within the idle timeout. Returns the number of games removed."""
+        cutoff = (time.monotonic() if now is None else now) - self._idle_timeout
+        idle = [game_id for game_id, session in self._sessions.items()
+                if session.last_used < cutoff and not session.lock.locked()]
+        for game_id in idle:
+            del self._sessions[game_id]
+        return len(idle)
+
+    async def run_evictions(self, interval=60.0):
+        """Coroutine evicting idle games every interval seconds, until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            self.evict_idle()
+
+    async def handle_request(self, line):
+        """Coroutine processing one request line. Returns the response line (without the newline)."""
+        words = line.split()
+        if not words:
+            return 'ERR bad-request'
+        command, arguments = words[0].upper(), words[1:]
+
+        async with self._inflight:
+            if command == 'NEW' and not arguments:
+                if len(self._sessions) >= self._max_games:
+                    self.evict_idle()
+                    if len(self._sessions) >= self._max_games:
+                        return 'ERR full'
+                game_id = str(next(self._ids))
+                self._sessions[game_id] = GameSession()
+                return f'OK {game_id}'
+
+            if command == 'QUIT' and not arguments:
+                return 'OK'
+
+            if not arguments:
+                return 'ERR bad-request'
+            session = self._sessions.get(arguments[0])
+            if session is None:
+                return 'ERR unknown-game'
+
+            async with session.lock:
+                session.last_used = time.monotonic()
+                return self._run_game_command(session, command, arguments[0], arguments[1:])
+
+    def _run_game_command(self, session, command, game_id, arguments):
+        """Runs a command on one game while its lock is held. Returns the response line."""
+        game = session.game
+        if command in ('MOVE', 'CHECK') and len(arguments) == 2:
+            return _response(game, game.try_move(*arguments, validate_only=command == 'CHECK'))
+        if command == 'FAIRY' and len(arguments) == 2:
+            return _response(game, game.try_enter_fairy_piece(*arguments))
+
+        if command == 'STATE' and not arguments:
+            return f'OK {game.get_game_state()} {game.get_players_turn()} {game.get_turn_count()}'
+        if command == 'POSITION' and not arguments:
+            return f'OK {game.to_position()}'
+        if command == 'MOVES' and not arguments:
+            return ' '.join(['OK'] + [str(move) for move in game.generate_moves()])
+        if command == 'CLOSE' and not arguments:
+            del self._sessions[game_id]
+            return 'OK'
+        return 'ERR bad-request'
+
+    async def handle_connection(self, reader, writer):
+        """Coroutine serving one client connection: answers its request lines in order until QUIT or disconnect."""
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:      # Line longer than MAX_LINE
+                    writer.write(b'ERR line-too-long\n')
+                    break
+                if not line:
+                    break
+                request = line.decode('utf-8', 'replace')
+                response = await self.handle_request(request)
+                writer.write(response.encode() + b'\n')
+                await writer.drain()
+                if [word.upper() for word in request.split()] == ['QUIT']:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host='127.0.0.1', port=8765, path=None, **host_options):
+    """Coroutine running a GameHost until cancelled, listening on a Unix socket at path if given, otherwise on TCP
+    host:port. host_options are passed to GameHost.
+    """
+    game_host = GameHost(**host_options)
+    if path is not None:
+        server = await asyncio.start_unix_server(game_host.handle_connection, path, limit=MAX_LINE)
+    else:
+        server = await asyncio.start_server(game_host.handle_connection, host, port, limit=MAX_LINE)
+    evictions = asyncio.ensure_future(game_host.run_evictions())
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        evictions.cancel()
+
+
+def main(argv=None):
+    """Command line entry point: runs the game host until interrupted."""
+    parser = argparse.ArgumentParser(description='Host many ChessVar games over a line-based local socket.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help='listen on this Unix socket path instead of TCP')
+    parser.add_argument('--max-games', type=int, default=100000)
+    parser.add_argument('--idle-timeout', type=float, default=1800.0)
+    parser.add_argument('--max-inflight', type=int, default=256)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, max_games=args.max_games,
+                          idle_timeout=args.idle_timeout, max_inflight=args.max_inflight))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
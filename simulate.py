@@ -0,0 +1,161 @@
+# Description: Batch simulator that plays many ChessVar games across a process pool. Each game is driven by a policy
+# ('random', 'greedy', or 'engine') seeded from the batch seed and the game's number, so a batch can be reproduced
+# exactly, and finished games stream back as compact GameResult records.
+
+import argparse
+import json
+import os
+import random
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from ChessVar import ChessVar, KING
+from engine import Engine, PIECE_VALUES
+
+POLICIES = ('random', 'greedy', 'engine')
+
+# Record of one finished game. moves is a tuple of move strings ('e2e4', 'F@d1'), winner is 'WHITE', 'BLACK', or
+# None if the game did not finish, fairy_entries is a tuple of (ply, move string), and error is None unless the game
+# crashed.
+GameResult = namedtuple('GameResult', ['game_id', 'seed', 'moves', 'winner', 'turn_count', 'fairy_entries', 'error'])
+
+
+def _choose_greedy(game, moves, rng):
+    """Returns the capture of the most valuable piece (the king above all), or a random move if there is none."""
+    board = game.get_current_board(read_only=True)
+    best_value = 0
+    best_moves = []
+    for move in moves:
+        if move.fairy is not None:
+            continue
+        target = board.get_piece(move.to_square)
+        if target is None:
+            continue
+        value = 1 << 20 if target.get_type() == KING else PIECE_VALUES[target.get_type()] + 1
+        if value > best_value:
+            best_value, best_moves = value, [move]
+        elif value == best_value:
+            best_moves.append(move)
+    return rng.choice(best_moves or moves)
+
+
+def play_game(game_id, policy='random', seed=0, max_plies=400, engine_depth=2, engine_time=None):
+    """Plays one game with both sides using the policy, until a king is captured, there is no legal move, or
+    max_plies moves have been made. The engine policy searches every move to engine_depth. engine_time, if given,
+    also limits each search to that many seconds, but then the moves depend on the machine's speed and the game can
+    no longer be reproduced from its seed. Returns a GameResult.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f'unknown policy {policy!r}, expected one of {POLICIES}')
+
+    game_seed = seed * 1000003 + game_id
+    rng = random.Random(game_seed)
+    engine = Engine(1 << 14) if policy == 'engine' else None
+    time_limit = engine_time if engine_time is not None else float('inf')
+    game = ChessVar()
+    moves = []
+    fairy_entries = []
+
+    while game.get_game_state() == 'UNFINISHED' and len(moves) < max_plies:
+        if engine is not None:
+            move = engine.get_best_move(game, time_limit, engine_depth)
+        else:
+            legal_moves = list(game.generate_moves())
+            if not legal_moves:
+                break
+            if policy == 'greedy':
+                move = _choose_greedy(game, legal_moves, rng)
+            else:
+                move = rng.choice(legal_moves)
+        if move is None:
+            break
+        if move.fairy is not None:
+            fairy_entries.append((len(moves), str(move)))
+        moves.append(str(move))
+        game.push(move)
+
+    state = game.get_game_state()
+    winner = state[:-4] if state != 'UNFINISHED' else None
+    return GameResult(game_id, game_seed, tuple(moves), winner, game.get_turn_count(), tuple(fairy_entries), None)
+
+
+def _play_game_safely(game_id, policy, seed, max_plies, engine_depth, engine_time):
+    """Runs play_game, turning any exception into a GameResult carrying the error, so one bad game is reported
+    rather than failing the batch.
+    """
+    try:
+        return play_game(game_id, policy, seed, max_plies, engine_depth, engine_time)
+    except Exception as error:
+        return GameResult(game_id, seed * 1000003 + game_id, (), None, 0, (), repr(error))
+
+
+def run_batch(games, policy='random', workers=None, seed=0, max_plies=400, engine_depth=2, engine_time=None):
+    """Generator playing the given number of games with the policy across a pool of worker processes (workers=None
+    uses one per CPU; workers=0 plays them in this process). Yields a GameResult for each game as it finishes, so
+    results are not held in memory; order depends on which worker finishes first, but each game's result depends
+    only on seed and its game_id. A game that raises is yielded with its error set. If a worker process dies, the
+    pool is restarted and its unfinished games are retried once before being reported as errors.
+    """
+    arguments = (policy, seed, max_plies, engine_depth, engine_time)
+    if workers == 0:
+        for game_id in range(games):
+            yield _play_game_safely(game_id, *arguments)
+        return
+
+    window = 4 * (workers or os.cpu_count() or 1)
+    pending = list(range(games - 1, -1, -1))
+    retried = set()
+    while pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            running = {}
+            broken = []
+            while pending or running:
+                while pending and len(running) < window:
+                    game_id = pending.pop()
+                    try:
+                        running[pool.submit(_play_game_safely, game_id, *arguments)] = game_id
+                    except BrokenProcessPool:   # A worker died while the last result was being handled
+                        broken.append(game_id)
+                        break
+                if not broken:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        game_id = running.pop(future)
+                        try:
+                            yield future.result()
+                        except BrokenProcessPool:
+                            broken.append(game_id)
+                if broken:
+                    broken.extend(running.values())
+                    break
+
+        for game_id in broken:
+            if game_id in retried:
+                yield GameResult(game_id, seed * 1000003 + game_id, (), None, 0, (), 'worker process died')
+            else:
+                retried.add(game_id)
+                pending.append(game_id)
+
+
+def main(argv=None):
+    """Command line entry point: plays a batch and writes one JSON object per game to standard output."""
+    parser = argparse.ArgumentParser(description='Play a batch of ChessVar games across worker processes.')
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--policy', choices=POLICIES, default='random')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-plies', type=int, default=400)
+    parser.add_argument('--engine-depth', type=int, default=2)
+    parser.add_argument('--engine-time', type=float, default=None,
+                        help='also limit each engine search to this many seconds (games are then not reproducible)')
+    args = parser.parse_args(argv)
+
+    for result in run_batch(args.games, args.policy, args.workers, args.seed, args.max_plies, args.engine_depth,
+                            args.engine_time):
+        print(json.dumps(result._asdict()), flush=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
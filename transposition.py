@@ -0,0 +1,55 @@
+# Description: Bounded transposition table storing search results by ChessVar position, keyed by the position's
+# Zobrist key (ChessVar.get_zobrist_key).
+
+# Kinds of score stored with an entry
+EXACT, LOWER_BOUND, UPPER_BOUND = range(3)
+
+
+class TranspositionTable:
+    """Class for a fixed-size transposition table. Each position's Zobrist key maps to a single slot; when two
+    positions share a slot, the result searched to the greater depth is kept (depth-preferred replacement), except
+    that a newer result for the same position always replaces the older one.
+    """
+
+    def __init__(self, size=1 << 20):
+        """Initializes an empty table with room for size entries, rounded up to a power of two."""
+        size = 1 << max(size - 1, 1).bit_length()
+        self._mask = size - 1
+        self._entries = [None] * size
+        self._count = 0
+
+    def __len__(self):
+        """Returns the number of entries stored in the table."""
+        return self._count
+
+    def get_size(self):
+        """Returns the number of slots in the table."""
+        return self._mask + 1
+
+    def store(self, key, depth, score, flag, best_move=None):
+        """Stores a search result for the position with the given Zobrist key: the depth searched, the score, the
+        kind of score (EXACT, LOWER_BOUND, or UPPER_BOUND), and the best move found. Returns True if it was stored,
+        or False if the slot holds a different position searched to a greater depth.
+        """
+        index = key & self._mask
+        entry = self._entries[index]
+        if entry is None:
+            self._count += 1
+        elif entry[0] != key and entry[1] > depth:
+            return False
+        self._entries[index] = (key, depth, score, flag, best_move)
+        return True
+
+    def probe(self, key):
+        """Returns the (key, depth, score, flag, best_move) entry stored for the position with the given Zobrist key,
+        or None if there is none.
+        """
+        entry = self._entries[key & self._mask]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def clear(self):
+        """Removes every entry from the table."""
+        self._entries = [None] * (self._mask + 1)
+        self._count = 0
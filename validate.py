@@ -0,0 +1,175 @@
+# Description: Streaming validator for archives of client game logs. Games are read lazily from a binary record file
+# (see records.py) or from text with one game per line, replayed through ChessVar across a pool of worker processes,
+# and reported with the first illegal ply (if any) and the final game state. Games are sent to the workers in chunks
+# and only a bounded window of chunks is in flight, so memory stays flat however large the archive is.
+#
+# A text game is a line of whitespace-separated moves as written by str(Move): 'e2e4' for make_move('e2', 'e4') and
+# 'F@d1' for enter_fairy_piece('F', 'd1'). A line may end with the game state the client claims ('WHITE_WON',
+# 'BLACK_WON', or 'UNFINISHED'), which is then checked against the replayed state. Blank lines and lines starting
+# with '#' are skipped.
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from ChessVar import ChessVar, Move, GAME_STATES
+from records import MAGIC, decode_move, iter_records
+
+CHUNK_GAMES = 256
+
+# Result of validating one game. index is the game's position in the input (from 0), plies the number of moves in the
+# log, illegal_ply the ply of the first illegal move (or None), reason describes what is wrong (None for a valid
+# game), state is the game state after the legal moves, and claimed_state the state given by the log, if any.
+ValidationResult = namedtuple('ValidationResult',
+                              ['index', 'plies', 'illegal_ply', 'reason', 'state', 'claimed_state'])
+
+
+def _parse_line(line):
+    """Returns the (moves, claimed state) of a text game line. Moves that do not parse are kept as their text."""
+    tokens = line.split()
+    claimed = None
+    if tokens and tokens[-1] in GAME_STATES:
+        claimed = tokens.pop()
+    moves = []
+    for token in tokens:
+        try:
+            moves.append(Move.from_string(token))
+        except ValueError:
+            moves.append(token)
+    return moves, claimed
+
+
+def validate_game(moves, claimed_state=None, index=0):
+    """Returns the ValidationResult of replaying the moves (Move objects, packed moves, or move strings) from the
+    start position.
+    """
+    game = ChessVar()
+    illegal_ply = None
+    reason = None
+    for ply, move in enumerate(moves):
+        if isinstance(move, int):
+            move = decode_move(move)
+        elif isinstance(move, str):
+            try:
+                move = Move.from_string(move)
+            except ValueError:
+                illegal_ply, reason = ply, f'unreadable move {move!r}'
+                break
+        if not game.push(move):
+            if game.get_game_state() != 'UNFINISHED':
+                reason = f'move {move} after the game ended'
+            else:
+                reason = f'illegal move {move}'
+            illegal_ply = ply
+            break
+
+    state = game.get_game_state()
+    if reason is None and claimed_state is not None and claimed_state != state:
+        reason = f'claimed {claimed_state} but the game is {state}'
+    return ValidationResult(index, len(moves), illegal_ply, reason, state, claimed_state)
+
+
+def _validate_chunk(kind, start, items):
+    """Worker task: returns the ValidationResults of a chunk of games, numbered from start. kind is 'text' for a list
+    of text lines, or 'records' for a list of (packed moves as native-order bytes, claimed state) pairs. A record
+    whose claimed state is None had an unreadable state byte, which makes the game invalid.
+    """
+    results = []
+    for offset, item in enumerate(items):
+        if kind == 'text':
+            moves, claimed = _parse_line(item)
+        else:
+            packed, claimed = item
+            moves = memoryview(packed).cast('H')
+        result = validate_game(moves, claimed, start + offset)
+        if kind == 'records' and claimed is None and result.reason is None:
+            result = result._replace(reason='unreadable claimed game state')
+        results.append(result)
+    return results
+
+
+def _read_chunks(source, chunk_games):
+    """Generator yielding (kind, start, items) chunks of games from a path or binary file object, reading lazily.
+    Record files are recognized by their magic bytes; anything else is read as text.
+    """
+    if isinstance(source, (str, bytes)) or hasattr(source, '__fspath__'):
+        with open(source, 'rb') as file:
+            yield from _read_chunks(file, chunk_games)
+        return
+
+    peek = source.peek(len(MAGIC))[:len(MAGIC)] if hasattr(source, 'peek') else b''
+    start = 0
+    items = []
+    if peek == MAGIC:
+        kind = 'records'
+        games = ((record.moves.tobytes(), record.state)
+                 for record in iter_records(source, decode=False, strict=False))
+    else:
+        kind = 'text'
+        games = (line for line in (raw.decode('utf-8', 'replace').strip() for raw in source)
+                 if line and not line.startswith('#'))
+    for game in games:
+        items.append(game)
+        if len(items) == chunk_games:
+            yield kind, start, items
+            start += len(items)
+            items = []
+    if items:
+        yield kind, start, items
+
+
+def validate_stream(source, workers=None, chunk_games=CHUNK_GAMES):
+    """Generator yielding a ValidationResult for each game read from source (a path or binary file object), in input
+    order. Games are validated across a pool of worker processes (workers=None uses one per CPU; workers=0 validates
+    them in this process), with at most a few chunks per worker read ahead.
+    """
+    chunks = _read_chunks(source, chunk_games)
+    if workers == 0:
+        for chunk in chunks:
+            yield from _validate_chunk(*chunk)
+        return
+
+    window = 2 * (workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        running = deque()
+        for chunk in chunks:
+            running.append(pool.submit(_validate_chunk, *chunk))
+            if len(running) >= window:
+                yield from running.popleft().result()
+        while running:
+            yield from running.popleft().result()
+
+
+def main(argv=None):
+    """Command line entry point: validates an archive and writes one JSON object per invalid game (or per game, with
+    --all) to standard output, and a throughput summary to standard error. Exits with status 1 if any game is invalid.
+    """
+    parser = argparse.ArgumentParser(description='Validate an archive of ChessVar game logs.')
+    parser.add_argument('source', nargs='?', default='-', help="record or text file ('-' for standard input)")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-games', type=int, default=CHUNK_GAMES)
+    parser.add_argument('--all', action='store_true', help='report valid games too')
+    args = parser.parse_args(argv)
+
+    source = sys.stdin.buffer if args.source == '-' else args.source
+    games = invalid = plies = 0
+    started = time.perf_counter()
+    for result in validate_stream(source, args.workers, args.chunk_games):
+        games += 1
+        plies += result.plies
+        if result.reason is not None:
+            invalid += 1
+        if args.all or result.reason is not None:
+            print(json.dumps(result._asdict()))
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    print(f'{games} games, {invalid} invalid, {plies} plies in {elapsed:.2f}s '
+          f'({games / elapsed:.0f} games/s, {plies / elapsed:.0f} plies/s)', file=sys.stderr)
+    return 1 if invalid else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())